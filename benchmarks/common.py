@@ -0,0 +1,74 @@
+import os
+import time
+
+# benchmarks never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from src.simulation import scaler, screen_scale_factor  # noqa: E402
+
+
+def setup_display(screen_size=(960, 540)):
+    """Initializes pygame on the dummy drivers and returns the screen and scale."""
+
+    pygame.init()
+    screen = pygame.display.set_mode(screen_size)
+    return screen, scaler(screen_scale_factor(screen_size))
+
+
+def parse_size(text):
+    """Parses a "WxH" screen size."""
+
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def rate(func, iterations):
+    """Calls func iterations times and returns calls per second."""
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+class SurfaceAllocations:
+    """Counts calls that return a new Surface while the context is active.
+
+    Every pygame.transform function and pygame.image.load is wrapped, so
+    code that looks them up on the module at call time is counted.
+    """
+
+    PATCHED = (
+        (pygame.transform, "flip"),
+        (pygame.transform, "scale"),
+        (pygame.transform, "smoothscale"),
+        (pygame.transform, "rotate"),
+        (pygame.transform, "rotozoom"),
+        (pygame.image, "load"),
+    )
+
+    def __init__(self):
+        self.count = 0
+        self._originals = []
+
+    def __enter__(self):
+        for module, name in self.PATCHED:
+            original = getattr(module, name)
+            self._originals.append((module, name, original))
+            setattr(module, name, self._counted(original))
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, original in self._originals:
+            setattr(module, name, original)
+        self._originals.clear()
+
+    def _counted(self, func):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return func(*args, **kwargs)
+
+        return counted
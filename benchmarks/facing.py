@@ -0,0 +1,36 @@
+from benchmarks.common import SurfaceAllocations, rate, setup_display
+
+from src.player import Player
+from src.simulation import LEFT, RIGHT, Match
+
+
+def bench_direction_changes(screen_size=(960, 540), iterations=20000):
+    """Turns a Player left and right every frame.
+
+    Returns:
+        dict: turns per second and Surfaces allocated while turning
+    """
+
+    screen, scale = setup_display(screen_size)
+    player1 = Player(screen, scale, facing_left=False)
+    player2 = Player(screen, scale, facing_left=True)
+    match = Match(player1, player2, scale)
+    inputs = [LEFT, RIGHT]
+
+    def turn():
+        inputs.reverse()
+        match.player_movement(player1, inputs[0])
+        player1.show_attacks()
+        player1.show()
+
+    turn()
+    with SurfaceAllocations() as allocations:
+        turns_per_second = rate(turn, iterations)
+
+    return {"turns_per_second": turns_per_second, "allocations": allocations.count}
+
+
+if __name__ == "__main__":
+    result = bench_direction_changes()
+    print(f"direction changes: {result['turns_per_second']:.0f}/s")
+    print(f"surface allocations while turning: {result['allocations']}")
@@ -0,0 +1,392 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from benchmarks.common import parse_size, rate
+from benchmarks.facing import bench_direction_changes
+from benchmarks.startup import bench_startup
+
+import pygame
+
+from main import Game
+from src.ai_enemy import AI_SCHEMES, AIEnemy
+from src.free_for_all import FreeForAll, nearest_opponents
+from src.simulation import BASE_TICK_RATE, Match
+
+SCREEN_SIZES = ((960, 540), (1920, 1080), (3840, 2160))
+
+# benchmarks that are not operations per second, lower is better, to the unit
+# they are printed in
+LOWER_IS_BETTER = {
+    "direction_change_allocations": "",
+    "startup_to_menu_ms": " ms",
+    "startup_to_loaded_ms": " ms",
+}
+
+# benchmarks that fail the run unless they are 0
+MUST_BE_ZERO = ("direction_change_allocations",)
+
+
+def record_inputs(screen_size, ticks, seed=0):
+    """Returns the input bitmasks two heuristic AIs press in a headless match."""
+
+    match = Match.headless(screen_size)
+    ai1 = AIEnemy(match.player2, match.player1, seed=seed)
+    ai2 = AIEnemy(match.player1, match.player2, seed=~seed)
+    inputs = []
+    for _ in range(ticks):
+        bits1, bits2 = ai1.get_input(), ai2.get_input()
+        inputs.append((bits1, bits2))
+        match.step(bits1, bits2)
+    return inputs
+
+
+def bench_simulation(screen_size, ticks=20000):
+    """Times Fighter.update + movement and Match.handle_collisions separately."""
+
+    inputs = record_inputs(screen_size, ticks)
+    match = Match.headless(screen_size)
+    clock = time.perf_counter
+    update_time = 0.0
+    collision_time = 0.0
+
+    for bits1, bits2 in inputs:
+        match.check_game_over()
+        match.handle_input(bits1, bits2)
+        start = clock()
+        match.update()
+        collided = clock()
+        match.handle_collisions()
+        moved = clock()
+        match.movement()
+        update_time += (collided - start) + (clock() - moved)
+        collision_time += moved - collided
+
+    return {
+        "update_movement": ticks / update_time,
+        "handle_collisions": ticks / collision_time,
+    }
+
+
+def bench_timesteps(screen_size, ticks=20000, rates=(120, 60, 30)):
+    """Times headless matches with random inputs at coarser tick rates.
+
+    Reported as seconds of play simulated per second, at the speed the
+    game runs on screen, which is what a coarser step trades fidelity for.
+    """
+
+    results = {}
+    for fps in rates:
+        rng = random.Random(0)
+        inputs = [(rng.getrandbits(6), rng.getrandbits(6)) for _ in range(ticks)]
+        match = Match.headless(screen_size, fps)
+        start = time.perf_counter()
+        for bits1, bits2 in inputs:
+            if match.step(bits1, bits2) is not None:
+                match = Match.headless(screen_size, fps)
+        played = ticks * match.base_ticks / BASE_TICK_RATE
+        results[f"sim_seconds_{fps}fps"] = played / (time.perf_counter() - start)
+    return results
+
+
+def bench_free_for_all(screen_size, ticks=20000, sizes=(8, 64)):
+    """Times FreeForAll.handle_collisions between heuristic AIs.
+
+    Reported per fighter, so collisions that scale linearly give the same
+    rate at every fighter count. The largest match is also timed checking
+    every pair instead of sweep and prune.
+    """
+
+    results = {}
+    runs = [(n, True) for n in sizes] + [(sizes[-1], False)]
+    for n, broadphase in runs:
+
+        def new_match():
+            match = FreeForAll.headless(n, screen_size, broadphase=broadphase)
+            ais = [
+                AIEnemy(match.fighters[0], f, seed=i)
+                for i, f in enumerate(match.fighters)
+            ]
+            return match, ais
+
+        match, ais = new_match()
+        inputs = [0] * n
+        frames = max(1, ticks // n)
+        clock = time.perf_counter
+        elapsed = 0.0
+
+        for _ in range(frames):
+            if match.check_game_over() is not None:
+                match, ais = new_match()
+            for i, target in nearest_opponents(match).items():
+                ais[i].playera = match.fighters[target]
+                inputs[i] = ais[i].get_input()
+            match.handle_input(inputs)
+            match.update()
+            start = clock()
+            match.handle_collisions()
+            elapsed += clock() - start
+            match.movement()
+
+        name = f"ffa{n}_collisions" if broadphase is True else f"ffa{n}_all_pairs"
+        results[name] = n * frames / elapsed
+    return results
+
+
+def bench_ai(screen_size, ticks=20000):
+    """Times get_input of every AI scheme against a heuristic opponent.
+
+    The search scheme also reports the frames it simulates per second.
+    """
+
+    results = {}
+    for scheme in AI_SCHEMES:
+        match = Match.headless(screen_size)
+        ai = AIEnemy(match.player1, match.player2, scheme, seed=1)
+        opponent = AIEnemy(match.player2, match.player1)
+        clock = time.perf_counter
+        elapsed = 0.0
+
+        for _ in range(ticks):
+            start = clock()
+            bits2 = ai.get_input()
+            elapsed += clock() - start
+            match.step(opponent.get_input(), bits2)
+
+        results[f"ai_{scheme}"] = ticks / elapsed
+        if scheme == "search":
+            results["ai_search_nodes"] = ai.stats()["nodes_per_second"]
+    return results
+
+
+def bench_rendering(screen_size, iterations=5000):
+    """Times text, HUD and player drawing on a Game of the given size."""
+
+    game = Game(screen_size)
+    game.menu = False
+
+    def show_text():
+        game._show_text("Press SPACE to start fight")
+        game._show_text(["1 Player", "2 Player"], game.layout.options_y, pointer=0)
+        game.renderer.drawn.clear()
+
+    def show_data():
+        game.show_data()
+        game.renderer.dirty.clear()
+
+    def show_data_changed():
+        game.hud_state = None
+        show_data()
+
+    def show():
+        game.player1.show_attacks()
+        game.player2.show_attacks()
+        game.player1.show()
+        game.player2.show()
+        game.renderer.drawn.clear()
+
+    def frame():
+        game.show_background()
+        game.player1.show_attacks()
+        game.player2.show_attacks()
+        game.player1.show()
+        game.player2.show()
+        game.show_data()
+        game.renderer.present()
+
+    return {
+        "show_text": rate(show_text, iterations),
+        "show_data": rate(show_data, iterations),
+        "show_data_changed": rate(show_data_changed, iterations),
+        "show": rate(show, iterations),
+        "render_frame": rate(frame, iterations),
+    }
+
+
+def bench_upscaled(screen_size, iterations=5000):
+    """Times a frame drawn at 960x540 and upscaled into a window of screen_size."""
+
+    game = Game(screen_size, render_size=(960, 540))
+    game.menu = False
+
+    def frame():
+        game.show_background()
+        game.player1.show_attacks()
+        game.player2.show_attacks()
+        game.player1.show()
+        game.player2.show()
+        game.show_data()
+        game.renderer.present()
+
+    return {"render_frame_upscaled": rate(frame, iterations)}
+
+
+def bench_snapshot(screen_size, iterations=20000):
+    """Times snapshot() followed by restore() of a Fighter and of a Game."""
+
+    match = Match.headless(screen_size)
+    fighter = match.player1
+    game = Game(screen_size)
+
+    def fighter_round_trip():
+        fighter.restore(fighter.snapshot())
+
+    def game_round_trip():
+        game.restore(game.snapshot())
+
+    return {
+        "fighter_snapshot_restore": rate(fighter_round_trip, iterations),
+        "game_snapshot_restore": rate(game_round_trip, iterations),
+    }
+
+
+def bench_facing(screen_size, iterations=20000):
+    """Times direction changes and counts the Surfaces they allocate."""
+
+    result = bench_direction_changes(screen_size, iterations)
+    return {
+        "direction_changes": result["turns_per_second"],
+        "direction_change_allocations": result["allocations"],
+    }
+
+
+BENCHMARKS = (
+    bench_simulation,
+    bench_timesteps,
+    bench_free_for_all,
+    bench_ai,
+    bench_rendering,
+    bench_upscaled,
+    bench_snapshot,
+    bench_facing,
+    bench_startup,
+)
+
+
+def run(screen_sizes=SCREEN_SIZES, quick=False):
+    """Runs every benchmark at every screen size.
+
+    Returns:
+        dict: "WxH" to benchmark name to operations per second
+    """
+
+    results = {}
+    for screen_size in screen_sizes:
+        size_results = {}
+        for benchmark in BENCHMARKS:
+            if quick is True:
+                size_results.update(benchmark(screen_size, 1000))
+            else:
+                size_results.update(benchmark(screen_size))
+        results["x".join(map(str, screen_size))] = size_results
+    return results
+
+
+def compare(baseline, results, threshold=0.1):
+    """Returns benchmarks that got worse than baseline by more than threshold.
+
+    Benchmarks in LOWER_IS_BETTER regress when they grow, the rest when
+    they shrink.
+
+    Returns:
+        list: (size, name, baseline value, current value) per regression
+    """
+
+    regressions = []
+    for size, size_results in results.items():
+        for name, current in size_results.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            if name in LOWER_IS_BETTER:
+                worse = current > previous * (1 + threshold)
+            else:
+                worse = current < previous * (1 - threshold)
+            if worse is True:
+                regressions.append((size, name, previous, current))
+    return regressions
+
+
+def nonzero(results):
+    """Returns the MUST_BE_ZERO benchmarks that are not 0.
+
+    Returns:
+        list: (size, name, value) per failure
+    """
+
+    return [
+        (size, name, size_results[name])
+        for size, size_results in results.items()
+        for name in MUST_BE_ZERO
+        if size_results.get(name, 0) != 0
+    ]
+
+
+def format_results(results, baseline=None):
+    lines = []
+    for size, size_results in results.items():
+        lines.append(size)
+        for name, current in size_results.items():
+            decimals = 0 if (current >= 100) | (current == int(current)) else 2
+            unit = LOWER_IS_BETTER.get(name, "/s")
+            line = f"  {name:<28}{current:>14,.{decimals}f}{unit}"
+            previous = None if baseline is None else baseline.get(size, {}).get(name)
+            if previous:
+                line += f"{100 * (current / previous - 1):>+9.1f}%"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite.")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=SCREEN_SIZES)
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.quick)
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print(format_results(results, baseline))
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "pygame": pygame.version.ver,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    failed = False
+    for size, name, value in nonzero(results):
+        print(f"FAILED {size} {name}: {value:,.0f}, expected 0", file=sys.stderr)
+        failed = True
+    if baseline is not None:
+        regressions = compare(baseline, results, args.threshold)
+        for size, name, previous, current in regressions:
+            unit = LOWER_IS_BETTER.get(name, "/s")
+            print(
+                f"REGRESSION {size} {name}: "
+                f"{previous:,.0f}{unit} -> {current:,.0f}{unit}",
+                file=sys.stderr,
+            )
+        failed |= len(regressions) > 0
+    if failed is True:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
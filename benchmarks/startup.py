@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import parse_size
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cold starts timed per screen size, the best one is reported
+STARTUP_RUNS = 3
+
+
+def measure_startup(screen_size=(960, 540)):
+    """Starts the game in a new process and times its startup stages.
+
+    Returns:
+        dict: seconds from process start to the first presented menu frame
+            ("menu") and until every asset finished loading ("loaded")
+    """
+
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    size = "x".join(map(str, screen_size))
+    start = time.perf_counter()
+    child = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.startup", "--child", size],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    stages = {}
+    for line in child.stdout:
+        stages[line.strip()] = time.perf_counter() - start
+    if child.wait() != 0:
+        raise RuntimeError(f"startup benchmark child exited with {child.returncode}")
+    return stages
+
+
+def bench_startup(screen_size, iterations=None, runs=STARTUP_RUNS):
+    """Best of a few cold starts, in milliseconds.
+
+    The number of starts does not follow iterations, so --quick times as
+    many as a full run.
+
+    Args:
+        screen_size (tuple): screen size to start the game at
+        iterations (int): ignored, taken like the other benchmarks
+        runs (int): cold starts to time, at least 1
+    """
+
+    starts = [measure_startup(screen_size) for _ in range(max(1, runs))]
+    return {
+        "startup_to_menu_ms": 1000 * min(start["menu"] for start in starts),
+        "startup_to_loaded_ms": 1000 * min(start["loaded"] for start in starts),
+    }
+
+
+def _child(screen_size):
+    from main import Game
+
+    game = Game(screen_size, max_fps=0)
+    game.run(frames=1)
+    print("menu", flush=True)
+    game.wait_loaded()
+    print("loaded", flush=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        _child(parse_size(sys.argv[2]))
+    else:
+        stages = measure_startup()
+        print(f"first menu frame: {1000 * stages['menu']:.0f} ms")
+        print(f"assets loaded: {1000 * stages['loaded']:.0f} ms")
@@ -1,32 +1,130 @@
 import pygame
+import argparse
 import math
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from src.player import Player
-from src.ai_enemy import AIEnemy
+from src.renderer import DirtyScreen
+from src.ai_enemy import AI_SCHEMES, AIEnemy
+from src.asset_pack import load_sound_pack, load_sprite_pack, read_index
+from src.assets import ASSETS, SPRITE_FILES, TextCache
+from src.audio import SOUNDS, AudioQueue
+from src.layout import Layout
+from src.netplay import LatencyShim, RollbackSession, UdpTransport
+from src.profiler import FrameProfiler
+from src.replay import (
+    KEYFRAME_INTERVAL,
+    RESTART,
+    InputRecorder,
+    InputReplay,
+    system_bits,
+    system_keys,
+)
+from src.simulation import (
+    BASE_TICK_RATE,
+    Match,
+    bits_from_keys,
+    scale,
+    scaler,
+    screen_scale_factor,
+    tick_fps,
+)
+
+# threads decoding images and sounds in the background during startup
+LOADER_THREADS = 2
+
+# frames drawn per second unless --max-fps says otherwise, twice the tick rate
+# so the fighters are still drawn between ticks without spinning a core
+MAX_FPS = 2 * BASE_TICK_RATE
 
 
 class Game:
-    def __init__(self) -> None:
-        """Initializes game."""
+    def __init__(
+        self,
+        screen_size=None,
+        record_path=None,
+        replay_path=None,
+        ai_scheme="heuristic",
+        render_size=None,
+        tick_rate=BASE_TICK_RATE,
+        max_fps=MAX_FPS,
+    ) -> None:
+        """Initializes game.
+
+        Args:
+            screen_size (tuple): size to fit the screen in, defaults to the monitor
+            record_path (str): file to record the inputs of the first fight to
+            replay_path (str): replay file to play back instead of the menu
+            ai_scheme (str): ai_scheme of the 1 player opponent
+            render_size (tuple): fixed size to simulate and draw at, upscaled to
+                a resizable window, None draws at the window size
+            tick_rate (int): simulation ticks per second, a divisor of
+                BASE_TICK_RATE, lower rates step coarser at the same game speed
+            max_fps (int): most frames drawn per second, the fighters are
+                interpolated between ticks, 0 draws as fast as possible
+        """
 
         pygame.init()
+        self.pack_index = read_index()
         self.running = True
         self.game_over = False
-        self.fps = 60
+        self.winner = None
+        self.fps = max_fps
         self.fps_clock = pygame.time.Clock()
+        self.tick_rate = tick_rate
+        self.max_ticks_per_frame = 5
+        self.accumulator = 0.0
+
+        # BOX_SHADOW_PROFILE=timings.csv (or .jsonl) records frame timings
+        self.profile_path = os.environ.get("BOX_SHADOW_PROFILE")
+        self.profiler = FrameProfiler(enabled=self.profile_path is not None)
+        self.show_profile = False
+        self.profile_lines = []
         self.menu = True
         self.main_menu = True
         self.screen_ratio = (16, 9)
+        self.render_size = render_size
         self.ai = False
-
-        self._setup_screen()
-        self._setup_elements()
+        self.ai_scheme = ai_scheme
+        self.ai_seed = random.getrandbits(32)
+
+        # input recording and replay
+        self.record_path = record_path
+        self.recorder = None
+        self.replay = None
+        self.replay_speed = 1
+        self.muted = False
+        self.netplay = None
+        if replay_path is not None:
+            self.replay = InputReplay(replay_path)
+            if render_size is None:
+                screen_size = self.replay.screen_size
+            else:
+                self.render_size = self.replay.screen_size
+            self.tick_rate = self.replay.tick_rate
+            self.ai = self.replay.ai_seed is not None
+            if self.ai is True:
+                self.ai_seed = self.replay.ai_seed
+            self.menu = False
+        self.fighter_fps = tick_fps(self.tick_rate)
+
+        self._setup_screen(screen_size)
+        self._start_loading()
         self._setup_audio()
+        self._setup_elements()
         self._setup_fonts()
         self._setup_menu()
+        self._setup_hud_sprites()
+
+        if self.replay is not None:
+            self.wait_loaded()
+            self.replay.keyframes.setdefault(0, self.snapshot())
 
     def scale(self, val: int) -> int:
-        """Scales values to screen size.
+        """Scales values to screen size, only used while setting up the layout.
 
         Args:
             val (int): value to be scaled
@@ -35,48 +133,80 @@ class Game:
             int: scaled value
         """
 
-        if isinstance(val, (int, float)):
-            return math.floor((val / 60) * self.scale_factor)
-        if isinstance(val, (list, tuple)):
-            return [math.floor((i / 60) * self.scale_factor) for i in val]
+        return scale(val, self.scale_factor)
 
-    def _setup_screen(self) -> None:
-        """Creates pygame screen and draws background."""
+    def _fit_screen(self, size):
+        """Returns the scale factor and size of the largest 16:9 screen in size."""
 
-        monitor_size = (
-            pygame.display.Info().current_w,
-            pygame.display.Info().current_h,
-        )
-        # monitor_size = (1000,700)
-
-        horiz = monitor_size[0] / self.screen_ratio[0]
-        vert = monitor_size[1] / self.screen_ratio[1]
-        self.scale_factor = min(horiz, vert)
-        self.screen_size = (
-            math.floor(self.scale_factor * self.screen_ratio[0]),
-            math.floor(self.scale_factor * self.screen_ratio[1]),
+        scale_factor = screen_scale_factor(size, self.screen_ratio)
+        return scale_factor, (
+            math.floor(scale_factor * self.screen_ratio[0]),
+            math.floor(scale_factor * self.screen_ratio[1]),
         )
 
-        self.screen = pygame.display.set_mode(self.screen_size)
+    def _setup_screen(self, monitor_size=None) -> None:
+        """Creates pygame screen and draws background.
+
+        With a render_size everything is drawn on an offscreen surface of
+        that size, which the renderer upscales into a resizable window.
+        """
+
+        if monitor_size is None:
+            monitor_size = (
+                pygame.display.Info().current_w,
+                pygame.display.Info().current_h,
+            )
+
+        if self.render_size is None:
+            self.scale_factor, self.screen_size = self._fit_screen(monitor_size)
+            self.window = None
+            self.screen = pygame.display.set_mode(self.screen_size)
+        else:
+            self.scale_factor, self.screen_size = self._fit_screen(self.render_size)
+            _, window_size = self._fit_screen(monitor_size)
+            self.window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+            self.screen = pygame.Surface(self.screen_size).convert()
+        self.renderer = DirtyScreen(self.screen, self.window)
+        self.sprite_pack = load_sprite_pack(self.screen_size, index=self.pack_index)
 
         # title and icon
         pygame.display.set_caption("Battle")
 
-        self.blue_heart_sprite = pygame.image.load(
-            "sprites/blue_heart.png"
-        ).convert_alpha()
-        self.blue_heart_sprite = pygame.transform.scale(
-            self.blue_heart_sprite, self.scale((30, 30))
+        self._setup_layout()
+        self._setup_layers()
+
+    def _setup_layout(self) -> None:
+        """Scales the pixel positions and sizes used while drawing."""
+
+        self.layout = Layout(self.scale, self.screen_size)
+
+    def _setup_layers(self) -> None:
+        """Creates the cached background and the HUD layer drawn over it."""
+
+        width, height = self.screen.get_size()
+        background = pygame.Surface((width, height)).convert()
+        background.fill((0, 0, 0))
+        pygame.draw.rect(
+            background,
+            (255, 255, 255),
+            (0, height * 0.78, width, self.layout.ground_line),
+        )
+
+        self.hud = pygame.Surface((width, self.layout.hud_height), pygame.SRCALPHA)
+        self.hud_state = None
+        self.renderer.set_layers(background, self.hud)
+
+    def _setup_hud_sprites(self) -> None:
+        """Gets the heart and stamina sprites, once the loader decodes them."""
+
+        self.blue_heart_sprite = ASSETS.surface(
+            "sprites/blue_heart.png", self.layout.heart_size
         )
-        self.red_heart_sprite = pygame.image.load(
-            "sprites/red_heart.png"
-        ).convert_alpha()
-        self.red_heart_sprite = pygame.transform.scale(
-            self.red_heart_sprite, self.scale((30, 30))
+        self.red_heart_sprite = ASSETS.surface(
+            "sprites/red_heart.png", self.layout.heart_size
         )
-        self.stamina_sprite = pygame.image.load("sprites/stamina.png").convert_alpha()
-        self.stamina_sprite = pygame.transform.scale(
-            self.stamina_sprite, self.scale((60, 60))
+        self.stamina_sprite = ASSETS.surface(
+            "sprites/stamina.png", self.layout.stamina_size
         )
 
     def _setup_menu(self) -> None:
@@ -85,36 +215,58 @@ class Game:
         self.menu_dict = {"main": True, "start_fight": False}
         self.pointer = 0
 
+    def _start_loading(self) -> None:
+        """Decodes images and sounds on a thread pool while startup goes on.
+
+        Anything that needs an asset first waits only for that asset, so
+        the menu shows before the sounds are decoded. Assets found in a
+        prebuilt pack are not decoded at all.
+        """
+
+        loader = ThreadPoolExecutor(LOADER_THREADS, thread_name_prefix="assets")
+        if self.sprite_pack is False:
+            ASSETS.preload(SPRITE_FILES, loader)
+        if load_sound_pack(index=self.pack_index) is False:
+            SOUNDS.preload(loader)
+        loader.shutdown(wait=False)
+
+    def wait_loaded(self) -> None:
+        """Waits for the assets still decoding in the background."""
+
+        ASSETS.finish()
+        SOUNDS.finish()
+
     def _setup_audio(self) -> None:
-        """Creates audio variables."""
+        """Creates the queue the match plays the shared sounds through."""
 
-        self.sword_hit_sound = pygame.mixer.Sound("sprites/sounds/sword_hit.mp3")
-        self.sword_hit_shield_sound = pygame.mixer.Sound(
-            "sprites/sounds/sword_hit_shield.wav"
-        )
-        self.sword_hit_shield_sound.set_volume(0.3)
+        self.audio = AudioQueue(SOUNDS)
+        self.audio.muted = self.muted
 
     def update_display(self) -> None:
         """Updates display."""
 
-        pygame.display.update()
+        self.renderer.present()
+        self.profiler.lap("update_display")
         self.fps_clock.tick(self.fps)
+        self.profiler.lap("idle")
 
     def show_background(self) -> None:
-        """Draws background."""
+        """Erases last frame's sprites and text from the cached background."""
 
-        self.screen.fill((0, 0, 0))
-        pygame.draw.rect(
-            self.screen,
-            (255, 255, 255),
-            (0, self.screen_size[1] * 0.78, self.screen_size[0], self.scale(10)),
-        )
+        self.renderer.begin_frame()
 
     def _setup_elements(self) -> None:
         """Creates character and environment elements."""
 
-        self.player1 = Player(self.screen, self.scale, facing_left=False)
-        self.player2 = Player(self.screen, self.scale, facing_left=True)
+        # shared per scale factor, so restarts reuse the compiled frame data
+        match_scale = scaler(self.scale_factor)
+        self.player1 = Player(
+            self.renderer, match_scale, self.fighter_fps, False, self.audio
+        )
+        self.player2 = Player(
+            self.renderer, match_scale, self.fighter_fps, True, self.audio
+        )
+        self.match = Match(self.player1, self.player2, match_scale, self.audio.emit)
         self._setup_ai()
 
     def _setup_ai(self) -> None:
@@ -122,16 +274,18 @@ class Game:
 
         if self.ai is True:
             self.ai_enemy = AIEnemy(
-                self.player2.input_dict,
                 self.player1,
                 self.player2,
-                ai_scheme="heuristic",
+                ai_scheme=self.ai_scheme,
+                seed=self.ai_seed,
             )
 
     def _setup_fonts(self) -> None:
         """Creates fonts for various texts."""
 
+        self.text_cache = TextCache()
         self.score_font = pygame.font.Font("freesansbold.ttf", self.scale(32))
+        self.profile_font = pygame.font.Font("freesansbold.ttf", self.scale(12))
         self.over_font = pygame.font.Font("freesansbold.ttf", self.scale(48))
 
     def handle_menu(self) -> None:
@@ -174,10 +328,10 @@ class Game:
 
         self._show_text("BOX SHADOW", font=self.over_font)
         texts = ["1 Player", "2 Player"]
-        self._show_text(texts, text_y=225, pointer=self.pointer)
+        self._show_text(texts, text_y=self.layout.options_y, pointer=self.pointer)
 
     def _show_start_fight_menu(self) -> None:
-        self._show_text("Press SPACE to start fight", 150)
+        self._show_text("Press SPACE to start fight")
 
         keys = pygame.event.get(pygame.KEYDOWN)
         if len(keys) > 0:
@@ -186,64 +340,83 @@ class Game:
                 self.menu_dict["start_fight"] = False
 
             if keys[0].key == pygame.K_SPACE:
+                self.wait_loaded()
                 self.menu = False
 
             if keys[0].key == pygame.K_ESCAPE:
                 self.running = False
 
-    def _show_text(self, text, text_y=150, pointer=None, font=None) -> None:
+    def _show_text(self, text, text_y=None, pointer=None, font=None) -> None:
         if not isinstance(text, list):
             text = [text]
         if font is None:
             font = self.score_font
+        if text_y is None:
+            text_y = self.layout.title_y
 
         center_width = self.screen_size[0] / 2
-        text_y = self.scale(text_y)
 
         for i, t in enumerate(text):
-            render_text = font.render(t, True, (255, 255, 255))
+            render_text = self.text_cache.render(font, t, True, (255, 255, 255))
             render_text_rect = render_text.get_rect(midtop=(center_width, text_y))
-            self.screen.blit(render_text, render_text_rect)
+            self.renderer.blit(render_text, render_text_rect)
             if (pointer is not None) & (i == pointer):
-                self.player1.sword_rect.midright = (
-                    render_text_rect.left - self.scale(2),
-                    render_text_rect.centery - self.scale(4),
+                offsetx, offsety = self.layout.pointer_offset
+                pointer_rect = self.player1.sword_sprite.get_rect(
+                    midright=(
+                        render_text_rect.left - offsetx,
+                        render_text_rect.centery - offsety,
+                    )
                 )
-                self.screen.blit(self.player1.sword_sprite, self.player1.sword_rect)
+                self.renderer.blit(self.player1.sword_sprite, pointer_rect)
 
-            text_y = render_text_rect.bottom + self.scale(1)
+            text_y = render_text_rect.bottom + self.layout.line_gap
 
     def show_data(self):
-        self._show_lives()
-        self._show_stamina()
+        """Redraws the HUD layer if lives or stamina changed."""
+
+        hud_state = (
+            self.player1.life,
+            self.player2.life,
+            self.player1.stamina,
+            self.player2.stamina,
+        )
+        if hud_state != self.hud_state:
+            self.hud_state = hud_state
+            self.hud.fill((0, 0, 0, 0))
+            self._show_lives()
+            self._show_stamina()
+            self.renderer.refresh_overlay()
 
     def _show_lives(self):
-        self.screen.blit(self.blue_heart_sprite, self.scale((15, 23)))
-        self.screen.blit(self.red_heart_sprite, self.scale((925, 23)))
+        layout = self.layout
+        self.hud.blit(self.blue_heart_sprite, layout.blue_heart)
+        self.hud.blit(self.red_heart_sprite, layout.red_heart)
 
-        y = self.scale(23)
-        size = self.scale(30)
+        y = layout.life_y
+        size = layout.box_size
 
         for i in range(self.player1.life):
-            x = self.scale(60) + self.scale(30) * i
-            pygame.draw.rect(self.screen, (99, 155, 255), [x, y, size, size])
+            x = layout.boxes_left + layout.box_step * i
+            pygame.draw.rect(self.hud, (99, 155, 255), [x, y, size, size])
         for i in range(self.player2.life):
-            x = self.screen_size[0] - self.scale(80) - self.scale(30) * i
-            pygame.draw.rect(self.screen, (217, 87, 99), [x, y, size, size])
+            x = layout.boxes_right - layout.box_step * i
+            pygame.draw.rect(self.hud, (217, 87, 99), [x, y, size, size])
 
     def _show_stamina(self):
-        y = self.scale(70)
-        size = self.scale(30)
+        layout = self.layout
+        y = layout.stamina_y
+        size = layout.box_size
 
         for i in range(self.player1.stamina):
-            x = self.scale(60) + self.scale(30) * i
-            pygame.draw.rect(self.screen, (255, 255, 255), [x, y, size, size])
+            x = layout.boxes_left + layout.box_step * i
+            pygame.draw.rect(self.hud, (255, 255, 255), [x, y, size, size])
         for i in range(self.player2.stamina):
-            x = self.screen_size[0] - self.scale(80) - self.scale(30) * i
-            pygame.draw.rect(self.screen, (255, 255, 255), [x, y, size, size])
+            x = layout.boxes_right - layout.box_step * i
+            pygame.draw.rect(self.hud, (255, 255, 255), [x, y, size, size])
 
-        self.screen.blit(self.stamina_sprite, self.scale((0, 50)))
-        self.screen.blit(self.stamina_sprite, self.scale((905, 50)))
+        self.hud.blit(self.stamina_sprite, layout.stamina_left)
+        self.hud.blit(self.stamina_sprite, layout.stamina_right)
 
     def handle_events(self):
         """Quits game if exit is pressed."""
@@ -254,49 +427,58 @@ class Game:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
-
-            if event.type == pygame.VIDEORESIZE:
-                self.screen = pygame.display.set_mode(
+                if event.key == pygame.K_F3:
+                    self.show_profile = not self.show_profile
+                    if self.show_profile is True:
+                        self.profiler.enable()
+                if (self.replay is not None) & (self.menu is False):
+                    self._handle_replay_key(event.key)
+
+            # only a render_size window is resizable, and only its upscale
+            # changes, the game keeps its render size
+            if (event.type == pygame.VIDEORESIZE) & (self.window is not None):
+                self.window = pygame.display.set_mode(
                     (event.w, event.h), pygame.RESIZABLE
                 )
-                self.player1.ground = round(self.screen.get_height() * 0.78)
-                self.player2.ground = round(self.screen.get_height() * 0.78)
-                over_font_size = round(
-                    min(self.screen.get_width() * 0.08, self.screen.get_height() * 0.08)
-                )
-                self.over_font = pygame.font.Font("freesansbold.ttf", over_font_size)
+                self.renderer.set_window(self.window)
+
+    def _handle_replay_key(self, key):
+        """Seeks 10 seconds with LEFT/RIGHT and changes speed with UP/DOWN."""
 
-    def handle_gameover(self):
+        if key == pygame.K_RIGHT:
+            self.seek(self.replay.tick + 10 * self.tick_rate)
+        elif key == pygame.K_LEFT:
+            self.seek(self.replay.tick - 10 * self.tick_rate)
+        elif key == pygame.K_UP:
+            self.set_replay_speed(self.replay_speed * 2)
+        elif key == pygame.K_DOWN:
+            self.set_replay_speed(self.replay_speed // 2)
+
+    def handle_gameover(self, keys):
         self._check_game_over()
-        self._handle_reset()
+        self._handle_reset(keys)
 
     def _check_game_over(self):
-        texts = ["Press SPACE to restart", "Press BACK to return to main menu"]
+        result = self.match.check_game_over()
 
-        if (self.player1.life <= 0) & (self.player2.life >= 1):
-            self._show_text("Player 2 wins", font=self.over_font)
-            self._show_text(texts, 225)
-            self.player1.rect.y = -2000
-            self.player1.knockback = True
+        if result is not None:
+            self.winner = result
             self.game_over = True
 
-        elif (self.player2.life <= 0) & (self.player1.life >= 1):
-            self._show_text("Player 1 wins", font=self.over_font)
-            self._show_text(texts, 225)
-            self.player2.rect.y = -2000
-            self.player2.knockback = True
-            self.game_over = True
+    def show_gameover(self):
+        """Draws the result and restart prompts while the game is over."""
 
-        elif (self.player2.life <= 0) & (self.player1.life <= 0):
-            self._show_text("Draw", font=self.over_font)
-            self._show_text(texts, 225)
-            self.player1.rect.y, self.player2.rect.y = -2000, -2000
-            self.player1.knockback, self.player2.knockback = True, True
-            self.game_over = True
+        if self.game_over is True:
+            texts = ["Press SPACE to restart", "Press BACK to return to main menu"]
+
+            if self.winner == 0:
+                self._show_text("Draw", font=self.over_font)
+            else:
+                self._show_text(f"Player {self.winner} wins", font=self.over_font)
+            self._show_text(texts, self.layout.options_y)
 
-    def _handle_reset(self):
+    def _handle_reset(self, keys):
         if self.game_over is True:
-            keys = pygame.key.get_pressed()
             if keys[pygame.K_SPACE]:
                 self.game_over = False
                 max_stamina1 = self.player1.max_stamina
@@ -315,207 +497,383 @@ class Game:
                 )
 
             if keys[pygame.K_BACKSPACE]:
-                self.game_over = False
-                self.menu = True
-                self.menu_dict["main"] = True
-                self.menu_dict["start_fight"] = False
-                self._setup_elements()
+                self._return_to_menu()
+
+    def _return_to_menu(self):
+        self.game_over = False
+        self.menu = True
+        self.menu_dict["main"] = True
+        self.menu_dict["start_fight"] = False
+        self._setup_elements()
+        self._stop_replay()
+
+    def _stop_replay(self):
+        """Finishes the recording or replay of the current fight."""
+
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+            self.record_path = None
+        if self.replay is not None:
+            self.replay = None
+            self.set_replay_speed(1)
+
+    def snapshot(self):
+        """Returns the state of the fight as a tuple of plain values."""
+
+        return (self.game_over, self.winner, self.match.snapshot())
+
+    def restore(self, state):
+        """Sets the state of the fight to a snapshot() taken earlier."""
+
+        self.game_over, self.winner, match_state = state
+        self.match.restore(match_state)
+        self.player1.store_position()
+        self.player2.store_position()
+
+    def set_muted(self, muted):
+        """Silences or unsilences match and player sounds."""
 
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
-        self._player_movement(self.player1, keys)
+        self.muted = muted
+        self.audio.muted = muted
 
+    def set_replay_speed(self, speed):
+        """Sets the fast-forward factor of a replay, silent above 1x.
+
+        Args:
+            speed (int): replay ticks per real time tick, from 1 to 64
+        """
+
+        self.replay_speed = max(1, min(speed, 64))
+        self.set_muted(self.replay_speed > 1)
+
+    def start_netplay(self, transport, local_player, delay=2, window=8):
+        """Starts a networked fight that skips the menu.
+
+        Both sides must simulate at the same screen size.
+
+        Args:
+            transport (UdpTransport | LatencyShim): connection to the peer
+            local_player (int): 1 or 2, the player this keyboard controls
+            delay (int): input delay in ticks
+            window (int): most ticks that may run on predicted input
+        """
+
+        self.ai = False
+        self.menu = False
+        self.wait_loaded()
+        self.netplay = RollbackSession(
+            self._simulate_netplay,
+            self.snapshot,
+            self.restore,
+            transport,
+            local_player,
+            delay,
+            window,
+        )
+
+    def _simulate_netplay(self, bits1, bits2):
+        """Simulates a tick of a networked fight, silently when rolling back."""
+
+        self.set_muted(self.netplay.resimulating)
+        self.simulate(system_keys(bits1 | bits2), (bits1, bits2))
+
+    def seek(self, tick):
+        """Jumps to a tick of the replay.
+
+        The nearest earlier keyframe is restored and the ticks after it are
+        resimulated silently without drawing anything.
+
+        Args:
+            tick (int): replay tick to continue from
+        """
+
+        tick = max(0, min(tick, len(self.replay)))
+        start, state = self.replay.keyframe_before(tick)
+        self.restore(state)
+        self.replay.tick = start
+
+        muted = self.muted
+        self.set_muted(True)
+        while (self.replay is not None) and (self.replay.tick < tick):
+            self.tick()
+        self.set_muted(muted)
+
+    def handle_input(self, keys, inputs=None):
+        """Passes one tick of keyboard and AI input, or of a replay, to the match.
+
+        Args:
+            keys (pygame.key.ScancodeWrapper): key state of the tick
+            inputs (tuple): replayed input bitmasks, used instead of keys and AI
+        """
+
+        if inputs is not None:
+            self.match.handle_input(*inputs)
+            self.profiler.lap("handle_input")
+            return
+
+        bits1 = bits_from_keys(keys, self.player1.input_dict)
         if self.ai is True:
-            ai_input = self.ai_enemy.get_input()
-            if ai_input is not None:
-                keys = ai_input
-
-        self._player_movement(self.player2, keys)
-
-    def _player_movement(self, player, keys):
-        if player.is_ready():
-            # left movement
-            if keys[player.input_dict["left"]]:
-                if player.facing_left is False:
-                    player.facing_left = True
-                    player.flip_player()
-
-                player.X_change = -player.speed
-                player.check_dash("Left")
-
-            # right movement
-            if keys[player.input_dict["right"]]:
-                if player.facing_left is True:
-                    player.facing_left = False
-                    player.flip_player()
-
-                player.X_change = player.speed
-                player.check_dash("Right")
-
-            # jumping
-            if keys[player.input_dict["jump"]]:
-                player.deploy_jump()
-
-            # downstrike
-            if keys[player.input_dict["down"]]:
-                player.deploy_downstrike()
-
-            # sword
-            if keys[player.input_dict["sword"]]:
-                player.deploy_strike()
-
-            # shield
-            if keys[player.input_dict["shield"]]:
-                player.deploy_shield()
-
-            # stopping
-            if keys[player.input_dict["right"]] and keys[player.input_dict["left"]]:
-                player.X_change = 0
-            if (
-                not keys[player.input_dict["right"]]
-                and not keys[player.input_dict["left"]]
-            ):
-                player.X_change = 0
-                player.check_dash()
+            self.profiler.lap("handle_input")
+            bits2 = self.ai_enemy.get_input()
+            self.profiler.lap("ai")
+        else:
+            bits2 = bits_from_keys(keys, self.player2.input_dict)
 
-    def handle_collisions(self):
-        """Handles collisions from both players and swords."""
+        if self.recorder is not None:
+            self.recorder.write(bits1 | system_bits(keys), bits2)
 
-        self._handle_sword_collisions()
-        self._handle_player_collisions()
-        self._handle_downstrike_collisions()
+        self.match.handle_input(bits1, bits2)
+        self.profiler.lap("handle_input")
 
-    def _handle_player_collisions(self):
-        """Handles player collisions."""
+    def tick(self):
+        """Advances the fight by one fixed simulation tick."""
 
-        # check collision between 2 players
-        collide = bool(self.player1.rect.colliderect(self.player2.rect))
+        self.player1.store_position()
+        self.player2.store_position()
 
-        if collide is True:
-            self._calc_player_collision(self.player1, self.player2)
-            self._calc_player_collision(self.player2, self.player1)
+        if self.netplay is not None:
+            # either key layout works, and only restarts are shared
+            keys = pygame.key.get_pressed()
+            self.netplay.advance(
+                bits_from_keys(keys, self.player1.input_dict)
+                | bits_from_keys(keys, self.player2.input_dict)
+                | (system_bits(keys) & RESTART)
+            )
+            return
+
+        inputs = None
+        if self.replay is not None:
+            if self.replay.tick % KEYFRAME_INTERVAL == 0:
+                self.replay.keyframes.setdefault(self.replay.tick, self.snapshot())
+            inputs = self.replay.next_inputs()
+            if inputs is None:
+                self._return_to_menu()
+                return
+            keys = system_keys(inputs[0])
         else:
-            self.player1.on_top = False
-            self.player2.on_top = False
-
-    def _calc_player_collision(self, playera, playerb):
-        playera.on_top = self._edge_detection(playera.rect.bottom, playerb.rect.top)
-
-        if (playera.on_top is False) & (playerb.on_top is False):
-            if playera.rect.x < playerb.rect.x:
-                if playera.X_change > 0:
-                    playera.X_change = 0
-                if playerb.X_change < 0:
-                    playerb.X_change = 0
-
-        # if player a is above player b
-        if playera.rect.y < playerb.rect.y:
-            # player a can't fall, player b can't jump
-            if playera.Y_change > 0:
-                playera.Y_change = 0
-            if playerb.Y_change < 0:
-                playerb.Y_change = 0
-
-        if playera.on_top is True:
-            playera.rect.bottom = playerb.rect.top + 1
-            self._edge_detection(playera.rect.bottom, playerb.rect.top)
-
-    def _edge_detection(self, edgea, edgeb, margin=30):
-        return abs(edgea - edgeb) < self.scale(margin)
-
-    def _handle_sword_collisions(self):
-        self._calc_sword_collisions(self.player1, self.player2)
-        self._calc_sword_collisions(self.player2, self.player1)
-
-    def _calc_sword_collisions(self, playera, playerb):
-        # if sword is deployed
-        if playera.sword_hurtbox is True:
-            # check collisions
-            playerb_collide = bool(playera.sword_rect.colliderect(playerb.rect))
-
-            if playerb.shielding is True:
-                shieldb_collide = bool(
-                    playera.sword_rect.colliderect(playerb.shield_rect)
+            keys = pygame.key.get_pressed()
+            if (self.record_path is not None) & (self.recorder is None):
+                self.recorder = InputRecorder(
+                    self.record_path,
+                    self.screen_size,
+                    self.tick_rate,
+                    self.ai_seed if self.ai is True else None,
                 )
-            else:
-                shieldb_collide = False
+            if self.recorder is not None:
+                if self.recorder.ticks % KEYFRAME_INTERVAL == 0:
+                    self.recorder.write_keyframe(self.snapshot())
 
-            # calc left/right for knockback
-            if playera.rect.centerx < playerb.rect.centerx:
-                playerb.knockback_speed = abs(playerb.knockback_speed)
-                playera.knockback_speed = -abs(playerb.knockback_speed)
-            else:
-                playerb.knockback_speed = -abs(playerb.knockback_speed)
-                playera.knockback_speed = abs(playerb.knockback_speed)
-
-            # hit shield and not player
-            if shieldb_collide and not playerb_collide:
-                self.do_shield_hit(playera)
-
-            # hit player
-            if playerb_collide:
-                if playera.rect.centerx < playerb.rect.centerx:
-                    if (playerb.facing_left) and (playerb.shield_block):
-                        self.do_shield_hit(playera)
-                    else:
-                        self.do_hit(playerb)
-
-                if playera.rect.centerx > playerb.rect.centerx:
-                    if (not playerb.facing_left) and (playerb.shield_block):
-                        self.do_shield_hit(playera)
-                    else:
-                        self.do_hit(playerb)
-
-    def _handle_downstrike_collisions(self):
-        self._calc_downstrike_collisions(self.player1, self.player2)
-        self._calc_downstrike_collisions(self.player2, self.player1)
-
-    def _calc_downstrike_collisions(self, playera, playerb):
-        # if sword is deployed
-        if playera.downstriking is True:
-            # check collisions
-            playerb_collide = bool(playera.downstrike_rect.colliderect(playerb.rect))
-
-            # hit player
-            if playerb_collide:
-                self.do_hit(playerb, knockback=False)
-
-    def do_hit(self, player, knockback=True):
-        if player.invinsible is False:
-            player.take_hit(knockback)
-            self.sword_hit_sound.play()
-
-    def do_shield_hit(self, player):
-        if player.knockback is False:
-            player.stamina = 0
-            self.sword_hit_shield_sound.play()
-            player.deploy_knockback()
+        self.simulate(keys, inputs)
 
+    def simulate(self, keys, inputs=None):
+        """Runs one simulation tick.
 
-if __name__ == "__main__":
-    game = Game()
+        Args:
+            keys: key state used for restarts, and for input without inputs
+            inputs (tuple): input bitmasks of both players, replacing keys and AI
+        """
+
+        self.handle_gameover(keys)
+        self.handle_input(keys, inputs)
+
+        self.match.update()
+        self.profiler.lap("update")
+        self.match.handle_collisions()
+        self.profiler.lap("handle_collisions")
+        self.match.movement()
+        self.match.frame += 1
+        self.profiler.lap("movement")
+
+    def show_profile_overlay(self):
+        """Draws p50/p99 frame times per phase, refreshed twice a second."""
+
+        if self.profiler.frames % 30 == 0 or not self.profile_lines:
+            lines = [f"{'phase':<18}{'p50 ms':>8}{'p99 ms':>8}"]
+            for phase, (p50, p99) in self.profiler.percentiles().items():
+                lines.append(f"{phase:<18}{p50:>8.2f}{p99:>8.2f}")
+            if self.netplay is not None:
+                stats = self.netplay.stats()
+                lines.append(
+                    f"rollbacks {stats['rollbacks']} max {stats['max_rollback']} "
+                    f"resim {stats['resim_ms_mean']:.2f} ms"
+                )
+            if (self.ai is True) and (self.ai_scheme == "search"):
+                stats = self.ai_enemy.stats()
+                lines.append(
+                    f"search {stats['nodes_per_second']:,.0f} nodes/s "
+                    f"{stats['search_ms_mean']:.2f} ms"
+                )
+            self.profile_lines = [
+                self.profile_font.render(line, True, (255, 255, 0)) for line in lines
+            ]
 
-    while game.running is True:
-        game.show_background()
+        x, y = self.layout.profile_pos
+        for line in self.profile_lines:
+            self.renderer.blit(line, (x, y))
+            y += line.get_height()
 
-        if game.menu is True:
-            game.handle_menu()
+    def advance(self, elapsed):
+        """Runs the simulation ticks that are due after elapsed seconds.
 
-        else:
-            game.handle_gameover()
-            game.handle_input()
+        At most max_ticks_per_frame ticks run per call, so a stalled machine
+        slows the game down instead of freezing while it catches up. A fast
+        forwarded replay runs replay_speed times as many ticks per frame and
+        only the last of them is drawn.
+
+        Args:
+            elapsed (float): seconds since the previous frame
+
+        Returns:
+            float: fraction of a tick left over, for render interpolation
+        """
+
+        speed = 1 if self.replay is None else self.replay_speed
+        tick_time = 1 / self.tick_rate
+        self.accumulator += elapsed * speed
 
-            game.player1.update()
-            game.player2.update()
+        ticks = 0
+        while self.accumulator >= tick_time:
+            if ticks == self.max_ticks_per_frame * speed:
+                self.accumulator %= tick_time
+                break
+            self.tick()
+            self.accumulator -= tick_time
+            ticks += 1
 
-            game.handle_collisions()
+        return self.accumulator / tick_time
 
-            game.player1.movement()
-            game.player2.movement()
+    def run(self, frames=None):
+        """Runs the game loop until the window is closed.
 
-        game.player1.show()
-        game.player2.show()
+        Args:
+            frames (int): stops after this many frames, None runs until closed
+        """
+
+        previous = time.perf_counter()
+
+        while self.running is True:
+            now = time.perf_counter()
+            elapsed = now - previous
+            previous = now
+            self.profiler.begin_frame()
+
+            self.show_background()
+            self.profiler.lap("show")
+
+            if self.menu is True:
+                self.handle_menu()
+                self.profiler.lap("handle_menu")
+                self.accumulator = 0.0
+                alpha = 1.0
+            else:
+                alpha = self.advance(elapsed)
+                self.audio.drain()
+                self.profiler.lap("audio")
+                self.show_gameover()
+
+            self.player1.show_attacks(alpha)
+            self.player2.show_attacks(alpha)
+            self.player1.show(alpha)
+            self.player2.show(alpha)
+            self.profiler.lap("show")
+
+            self.show_data()
+            if self.show_profile is True:
+                self.show_profile_overlay()
+            self.profiler.lap("show_data")
+            self.handle_events()
+            self.profiler.lap("handle_events")
+            self.update_display()
+            self.profiler.end_frame()
+            if frames is not None:
+                frames -= 1
+                if frames == 0:
+                    self.running = False
 
-        game.show_data()
-        game.handle_events()
-        game.update_display()
+        if self.profile_path is not None:
+            self.profiler.dump(self.profile_path)
+        self._stop_replay()
+        if self.netplay is not None:
+            print(self.netplay.format_stats())
+            self.netplay.transport.close()
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Box Shadow")
+    parser.add_argument("--record", help="record the inputs of the first fight")
+    parser.add_argument("--replay", help="play back a recorded fight")
+    parser.add_argument("--seek", type=float, help="start the replay at SEEK seconds")
+    parser.add_argument("--speed", type=int, default=1, help="replay fast-forward")
+    parser.add_argument("--host", type=int, metavar="PORT", help="host a net fight")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="join a net fight")
+    parser.add_argument("--port", type=int, default=0, help="local port to join from")
+    parser.add_argument("--delay", type=int, default=2, help="input delay in ticks")
+    parser.add_argument("--rollback", type=int, default=8, help="rollback window")
+    parser.add_argument("--latency", type=float, default=0, help="added one-way ms")
+    parser.add_argument("--jitter", type=float, default=0, help="added jitter ms")
+    parser.add_argument("--loss", type=float, default=0, help="dropped packets 0-1")
+    parser.add_argument(
+        "--render-size",
+        type=parse_size,
+        metavar="WxH",
+        help="draw at a fixed size and upscale it to a resizable window",
+    )
+    parser.add_argument(
+        "--tick-rate",
+        type=int,
+        default=BASE_TICK_RATE,
+        help=f"simulation ticks per second, a divisor of {BASE_TICK_RATE}",
+    )
+    parser.add_argument(
+        "--max-fps", type=int, default=MAX_FPS, help="frame rate cap, 0 for uncapped"
+    )
+    parser.add_argument(
+        "--ai", default="heuristic", choices=AI_SCHEMES, help="1 player opponent"
+    )
+    args = parser.parse_args()
+    if (args.replay is None) & ((args.seek is not None) | (args.speed != 1)):
+        parser.error("--seek and --speed need --replay")
+    if BASE_TICK_RATE % args.tick_rate != 0:
+        parser.error(f"--tick-rate must divide {BASE_TICK_RATE}")
+
+    transport = None
+    if args.host is not None:
+        transport, local_player = UdpTransport(args.host), 1
+    elif args.connect is not None:
+        host, port = args.connect.rsplit(":", 1)
+        transport, local_player = UdpTransport(args.port, (host, int(port))), 2
+    if (transport is not None) & ((args.latency, args.jitter, args.loss) != (0, 0, 0)):
+        transport = LatencyShim(
+            transport, args.latency / 1000, args.jitter / 1000, args.loss
+        )
+
+    # networked fights are simulated at a fixed size and rate so both sides agree
+    screen_size, render_size, tick_rate = None, args.render_size, args.tick_rate
+    if transport is not None:
+        tick_rate = BASE_TICK_RATE
+        if render_size is None:
+            screen_size = (960, 540)
+        else:
+            render_size = (960, 540)
+    game = Game(
+        screen_size,
+        record_path=args.record,
+        replay_path=args.replay,
+        ai_scheme=args.ai,
+        render_size=render_size,
+        tick_rate=tick_rate,
+        max_fps=args.max_fps,
+    )
+    if transport is not None:
+        game.start_netplay(transport, local_player, args.delay, args.rollback)
+    if args.replay is not None:
+        if args.seek is not None:
+            game.seek(round(args.seek * game.tick_rate))
+        game.set_replay_speed(args.speed)
+    game.run()
@@ -1,52 +1,156 @@
+import math
 import random
+import time
+
+from src.simulation import DOWN, JUMP, LEFT, RIGHT, SHIELD, SWORD, Fighter, Match
+
+AI_SCHEMES = ("random_input", "random_sequence", "heuristic", "search")
+ACTION_BITS = (JUMP, LEFT, RIGHT, DOWN, SWORD, SHIELD)
+
+# distances on the 960x540 design grid
+ON_TOP_DISTANCE = 20
+UNDER_DISTANCE = 50
+CLOSE_DISTANCE = 100
+FAR_DISTANCE = 160
+EDGE_DISTANCE = 100
+
+# the search scheme plays each candidate sequence for at least
+# SEARCH_HORIZON frames and picks a new one every REPLAN_INTERVAL frames
+SEARCH_HORIZON = 20
+REPLAN_INTERVAL = 8
+# simulated frames per search in headless play, about what the default 2 ms
+# budget buys, so seeded results don't depend on machine speed or load
+HEADLESS_SEARCH_NODES = 200
+EXPLORATION = 0.5
+
+# weights of the search scheme's evaluation of a simulated state
+LIFE_WEIGHT = 1.0
+STAMINA_WEIGHT = 0.1
+DISTANCE_WEIGHT = 0.2
+
+
+class AIFeatures:
+    """What an AI sees of a fight in one tick, computed once by observe().
+
+    Distances are compared against thresholds scaled to the screen size
+    once in set_scale(), instead of being rescaled on every query.
+    """
+
+    __slots__ = (
+        "on_top_distance",
+        "under_distance",
+        "close_distance",
+        "far_distance",
+        "edge_distance",
+        "dx",
+        "distance",
+        "left",
+        "right",
+        "far",
+        "close",
+        "medium",
+        "on_top",
+        "under",
+        "near_left_edge",
+        "near_right_edge",
+        "stamina",
+        "striking",
+        "opponent_striking",
+        "opponent_stunned",
+    )
+
+    def __init__(self, scale):
+        self.set_scale(scale)
+        self.dx = self.distance = self.stamina = 0
+        self.left = self.right = self.far = self.close = self.medium = False
+        self.on_top = self.under = False
+        self.near_left_edge = self.near_right_edge = False
+        self.striking = self.opponent_striking = self.opponent_stunned = False
+
+    def set_scale(self, scale):
+        """Scales the distance thresholds to the screen size.
+
+        Args:
+            scale (function): scales values from the design grid to screen size
+        """
+
+        self.on_top_distance = scale(ON_TOP_DISTANCE)
+        self.under_distance = scale(UNDER_DISTANCE)
+        self.close_distance = scale(CLOSE_DISTANCE)
+        self.far_distance = scale(FAR_DISTANCE)
+        self.edge_distance = scale(EDGE_DISTANCE)
+
+    def observe(self, opponent, fighter):
+        """Updates the features of fighter against opponent for this tick.
+
+        Args:
+            opponent (Fighter): fighter the AI plays against
+            fighter (Fighter): fighter controlled by the AI
+        """
+
+        dx = opponent.rect.centerx - fighter.rect.centerx
+        dy = opponent.rect.centery - fighter.rect.centery
+        distance = abs(dx)
+        self.dx = dx
+        self.distance = distance
+        self.left = dx < 0
+        self.right = dx > 0
+        self.far = distance > self.far_distance
+        self.close = distance < self.close_distance
+        self.medium = (not self.far) & (not self.close)
+        self.on_top = (dy > 0) & (distance < self.on_top_distance)
+        self.under = (dy < 0) & (distance < self.under_distance)
+        self.near_left_edge = abs(fighter.rect.x) < self.edge_distance
+        self.near_right_edge = abs(fighter.rect.x - fighter.width) < self.edge_distance
+        self.stamina = fighter.stamina
+        self.striking = fighter.striking
+        self.opponent_striking = opponent.striking
+        self.opponent_stunned = opponent.land_downstrike_stun
 
 
 class AIEnemy:
-    def __init__(self, input_dict, playera, playerb, ai_scheme="heuristic"):
+    def __init__(
+        self,
+        playera,
+        playerb,
+        ai_scheme="heuristic",
+        seed=None,
+        budget=0.002,
+        max_nodes=None,
+    ):
+        """Creates an AI that plays playerb against playera.
+
+        Args:
+            playera (Fighter): opponent
+            playerb (Fighter): fighter controlled by the AI
+            ai_scheme (str): "heuristic", "search", "random_sequence" or
+                "random_input"
+            seed (int): seed of the AI's random choices
+            budget (float): seconds the search scheme may think per frame,
+                None for no time limit
+            max_nodes (int): simulated frames per search, None for no limit
+        """
+
         self.ai_scheme = ai_scheme
         self.playera = playera
         self.playerb = playerb
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.features = AIFeatures(playera.scale)
 
-        self.input_dict = input_dict
-        self.ai_key_dict = {
-            self.input_dict["jump"]: 0,
-            self.input_dict["left"]: 0,
-            self.input_dict["right"]: 0,
-            self.input_dict["down"]: 0,
-            self.input_dict["sword"]: 0,
-            self.input_dict["shield"]: 0,
-        }
-
+        # sequences are lists of input bitmasks, one per frame
         if ai_scheme != "random_input":
-            self.walk_left = [self.input_dict["left"]] * 10
-            self.walk_right = [self.input_dict["right"]] * 10
-            self.sword = [self.input_dict["sword"]]
-            self.shield = [self.input_dict["shield"]]
-            self.dash_left = (
-                [self.input_dict["left"]] * 3
-                + [None] * 3
-                + [self.input_dict["left"]] * 5
-                + self.sword
-            )
-            self.dash_right = (
-                [self.input_dict["right"]] * 3
-                + [None] * 3
-                + [self.input_dict["right"]] * 5
-                + self.sword
-            )
-            self.jump_left = [
-                [self.input_dict["jump"], self.input_dict["left"]]
-            ] + self.walk_left
-            self.jump_right = [
-                [self.input_dict["jump"], self.input_dict["right"]]
-            ] + self.walk_right
-            self.jump_left_downstrike = (
-                self.jump_left + self.walk_left * 2 + [self.input_dict["down"]]
-            )
-            self.jump_right_downstrike = (
-                self.jump_right + self.walk_right * 2 + [self.input_dict["down"]]
-            )
-            self.down_strike = [self.input_dict["jump"]] * 5 + [self.input_dict["down"]]
+            self.walk_left = [LEFT] * 10
+            self.walk_right = [RIGHT] * 10
+            self.sword = [SWORD]
+            self.shield = [SHIELD]
+            self.dash_left = [LEFT] * 3 + [0] * 3 + [LEFT] * 5 + self.sword
+            self.dash_right = [RIGHT] * 3 + [0] * 3 + [RIGHT] * 5 + self.sword
+            self.jump_left = [JUMP | LEFT] + self.walk_left
+            self.jump_right = [JUMP | RIGHT] + self.walk_right
+            self.jump_left_downstrike = self.jump_left + self.walk_left * 2 + [DOWN]
+            self.jump_right_downstrike = self.jump_right + self.walk_right * 2 + [DOWN]
+            self.down_strike = [JUMP] * 5 + [DOWN]
 
             self.sequence_index = 0
             self.sequence_list = [
@@ -68,35 +172,35 @@ class AIEnemy:
             self.sequence_break = False
             self.avoiding = False
 
+        if ai_scheme == "search":
+            self._setup_search(budget, max_nodes)
+
     def get_input(self):
+        """Returns the input bitmask of the next frame."""
+
         if self.ai_scheme == "random_input":
             return self._random_input()
         elif self.ai_scheme == "random_sequence":
             return self._random_sequence()
         elif self.ai_scheme == "heuristic":
             return self._heuristics()
+        elif self.ai_scheme == "search":
+            return self._search_input()
 
     def _random_input(self):
-        ai_key_dict_copy = self.ai_key_dict.copy()
-        ai_key_dict_copy[random.sample(self.ai_key_dict.keys(), 1)[0]] = 1
-
-        return ai_key_dict_copy
+        return self.random.choice(ACTION_BITS)
 
     def _random_sequence(self):
         if self.sequence_index == len(self.sequence) - 1:
-            self.sequence = random.sample(self.sequence_list, 1)[0]
+            self.sequence = self.random.sample(self.sequence_list, 1)[0]
             self.sequence_index = 0
         else:
             self.sequence_index += 1
 
-        input = self.sequence[self.sequence_index]
-
-        ai_key_dict_copy = self.ai_key_dict.copy()
-        ai_key_dict_copy[input] = 1
-
-        return ai_key_dict_copy
+        return self.sequence[self.sequence_index]
 
     def _heuristics(self):
+        self.features.observe(self.playera, self.playerb)
         self._check_sequence_break()
 
         if self.sequence_index >= len(self.sequence) - 1:
@@ -107,109 +211,102 @@ class AIEnemy:
         else:
             self.sequence_index += 1
 
-        input = self.sequence[self.sequence_index]
-        ai_key_dict_copy = self.ai_key_dict.copy()
-
-        if not isinstance(input, list):
-            input = [input]
-        for i in input:
-            ai_key_dict_copy[i] = 1
-
-        return ai_key_dict_copy
+        return self.sequence[self.sequence_index]
 
     def _choose_heuristic(self):
         """Choose the heuristic to follow based on the current game state
 
         Returns:
-            list: list of inputs to be executed
+            list: input bitmasks to be executed
         """
 
-        sequence = [None]
+        f = self.features
+        sequence = [0]
 
         # no stamina, avoid
-        if not self._has_stamina():
+        if f.stamina < 1:
             sequence = self._avoid()
 
         # is over or under
-        elif self._is_on_top():
+        elif f.on_top:
             possible_sequences = [self.down_strike, self.walk_right, self.walk_left]
-            sequence = random.sample(possible_sequences, 1)[0]
+            sequence = self.random.sample(possible_sequences, 1)[0]
 
-        elif self._is_under():
-            if self._has_stamina(3):
+        elif f.under:
+            if f.stamina >= 3:
                 possible_sequences = [
                     self.dash_left,
                     self.dash_right,
                     self.walk_left * 2,
                     self.walk_right * 2,
                 ]
-                sequence = random.sample(possible_sequences, 1)[0]
+                sequence = self.random.sample(possible_sequences, 1)[0]
             else:
                 possible_sequences = [self.walk_left * 2, self.walk_right * 2]
-                sequence = random.sample(possible_sequences, 1)[0]
+                sequence = self.random.sample(possible_sequences, 1)[0]
         # far away
-        elif self._is_far():
-            if self._is_left():
+        elif f.far:
+            if f.left:
                 sequence = self.walk_left
             else:
                 sequence = self.walk_right
         # close
-        elif self._is_close():
-            if self.playera.striking:
+        elif f.close:
+            if f.opponent_striking:
                 sequence = self.shield
             else:
-                if self._is_left():
-                    sequence = [[self.input_dict["left"], self.input_dict["sword"]]]
+                if f.left:
+                    sequence = [LEFT | SWORD]
                 else:
-                    sequence = [[self.input_dict["right"], self.input_dict["sword"]]]
-            if self.playerb.striking:
-                if self._is_left:
-                    sequence = self.walk_left
-                if self._is_right:
-                    sequence = self.walk_right
+                    sequence = [RIGHT | SWORD]
+            # this branch has always walked right while striking, whichever
+            # side the opponent is on
+            if f.striking:
+                sequence = self.walk_right
 
         # medium distance
-        elif self._is_left() & self._is_medium():
-            if self._has_stamina(2):
+        elif f.left & f.medium:
+            if f.stamina >= 2:
                 possible_sequences = [
                     self.jump_left_downstrike,
                     self.dash_left,
                     self.walk_left,
                 ]
-                sequence = random.sample(possible_sequences, 1)[0]
+                sequence = self.random.sample(possible_sequences, 1)[0]
             else:
                 possible_sequences = [self.jump_left_downstrike, self.walk_left]
-                sequence = random.sample(possible_sequences, 1)[0]
-        elif self._is_right() & self._is_medium():
-            if self._has_stamina(2):
+                sequence = self.random.sample(possible_sequences, 1)[0]
+        elif f.right & f.medium:
+            if f.stamina >= 2:
                 possible_sequences = [
                     self.jump_right_downstrike,
                     self.dash_right,
                     self.walk_right,
                 ]
-                sequence = random.sample(possible_sequences, 1)[0]
+                sequence = self.random.sample(possible_sequences, 1)[0]
             else:
                 possible_sequences = [self.jump_right_downstrike, self.walk_right]
-                sequence = random.sample(possible_sequences, 1)[0]
+                sequence = self.random.sample(possible_sequences, 1)[0]
         # enemy in stun
-        elif self._is_left() & (self.playera.land_downstrike_stun is True):
-            if self._is_far() & self._has_stamina(3):
+        elif f.left & (f.opponent_stunned is True):
+            if f.far & (f.stamina >= 3):
                 possible_sequences = [self.walk_left, self.dash_left]
-                sequence = random.sample(possible_sequences, 1)[0]
-            if (self._is_medium() or self._is_close()) & self._has_stamina(1):
+                sequence = self.random.sample(possible_sequences, 1)[0]
+            if (f.medium or f.close) & (f.stamina >= 1):
                 sequence = self.walk_left + self.sword
-        elif self._is_right() & (self.playera.land_downstrike_stun is True):
-            if self._is_far() & self._has_stamina(3):
+        elif f.right & (f.opponent_stunned is True):
+            if f.far & (f.stamina >= 3):
                 possible_sequences = [self.walk_right, self.dash_right]
-                sequence = random.sample(possible_sequences, 1)[0]
-            if (self._is_medium() or self._is_close()) & self._has_stamina(1):
+                sequence = self.random.sample(possible_sequences, 1)[0]
+            if (f.medium or f.close) & (f.stamina >= 1):
                 sequence = self.walk_right + self.sword
 
         return sequence
 
     def _check_sequence_break(self):
+        f = self.features
         if self.sequence_break is False:
-            if self._is_close() & self._has_stamina() & self.playera.striking:
+            if f.close & (f.stamina >= 1) & f.opponent_striking:
                 self._do_sequence_break(self.shield)
 
     def _do_sequence_break(self, sequence):
@@ -218,64 +315,191 @@ class AIEnemy:
         self.sequence = sequence
 
     def _avoid(self):
+        f = self.features
         self.sequence_index = 0
         self.sequence_break = True
         self.avoiding = True
-        if self.playerb.stamina >= 2:
+        if f.stamina >= 2:
             self.avoiding = False
 
-        if self._is_left():
-            if self._near_right_edge():
-                possible_sequences = [self.walk_left * 3, self.jump_left]
-                sequence = random.sample(possible_sequences, 1)[0]
-                return sequence
-            else:
-                self.walk_left
-        if self._is_right():
-            if self._near_left_edge():
-                possible_sequences = [self.walk_right * 3, self.jump_right]
-                sequence = random.sample(possible_sequences, 1)[0]
-                return sequence
-            else:
-                self.walk_right
-        return [None]
-
-    def _is_left(self):
-        return self.playera.rect.centerx < self.playerb.rect.centerx
+        if f.left & f.near_right_edge:
+            possible_sequences = [self.walk_left * 3, self.jump_left]
+            return self.random.sample(possible_sequences, 1)[0]
+        if f.right & f.near_left_edge:
+            possible_sequences = [self.walk_right * 3, self.jump_right]
+            return self.random.sample(possible_sequences, 1)[0]
+        return [0]
+
+    def _setup_search(self, budget, max_nodes):
+        """Creates the shadow match the search scheme simulates on."""
+
+        self.budget = budget
+        self.max_nodes = max_nodes
+        self.clock = time.perf_counter
+        self.search_sequences = [
+            self.walk_left,
+            self.walk_right,
+            self.dash_left,
+            self.dash_right,
+            self.sword,
+            [LEFT | SWORD],
+            [RIGHT | SWORD],
+            self.shield,
+            self.jump_left_downstrike,
+            self.jump_right_downstrike,
+            self.down_strike,
+        ]
+        self.sequence = [0]
+
+        # the AI's fighter is player 2 of the shadow match, like in a 1 player game
+        arena_size = (self.playerb.width, self.playerb.height)
+        self.shadow = Match(
+            Fighter(arena_size, self.playera.scale, self.playera.fps),
+            Fighter(arena_size, self.playerb.scale, self.playerb.fps),
+            self.playerb.scale,
+        )
 
-    def _is_right(self):
-        return self.playera.rect.centerx > self.playerb.rect.centerx
+        self.searches = 0
+        self.rollouts = 0
+        self.nodes = 0
+        self.search_time = 0.0
+        self.max_search_time = 0.0
+
+    def _search_input(self):
+        self.sequence_index += 1
+        if (self.sequence_index >= len(self.sequence)) | (
+            self.sequence_index % REPLAN_INTERVAL == 0
+        ):
+            self.sequence = self._search()
+            self.sequence_index = 0
+        return self.sequence[self.sequence_index]
 
-    def _is_far(self, distance=160):
-        return abs(
-            self.playera.rect.centerx - self.playerb.rect.centerx
-        ) > self.playera.scale(distance)
+    def _search(self):
+        """Picks the sequence with the best simulated outcome.
 
-    def _is_medium(self, low_distance=100, high_distance=160):
-        return (not self._is_far(high_distance)) & (not self._is_close(low_distance))
+        A Monte Carlo search over the sequences, and over the rest of the
+        current one: the bandit at the root chooses which sequence to try
+        next by UCB1, and each rollout plays it on a copy of the fight
+        against a random opponent sequence, then scores the final state.
+        Rollouts stop when the time budget or node limit runs out.
 
-    def _is_close(self, distance=100):
-        return abs(
-            self.playera.rect.centerx - self.playerb.rect.centerx
-        ) < self.playera.scale(distance)
+        Returns:
+            list: input bitmasks to be executed
+        """
 
-    def _is_on_top(self):
-        return (self.playerb.rect.centery < self.playera.rect.centery) & self._is_close(
-            20
+        start = self.clock()
+        deadline = None if self.budget is None else start + self.budget
+        max_nodes = math.inf if self.max_nodes is None else self.max_nodes
+
+        for shadow_player, player in (
+            (self.shadow.player1, self.playera),
+            (self.shadow.player2, self.playerb),
+        ):
+            shadow_player.width, shadow_player.height = player.width, player.height
+            shadow_player.ground = player.ground
+        root = (0, False, self.playera.snapshot(), self.playerb.snapshot())
+
+        candidates = list(self.search_sequences)
+        rest = self.sequence[self.sequence_index :]
+        if rest:
+            candidates.append(rest)
+        visits = [0] * len(candidates)
+        totals = [0.0] * len(candidates)
+        nodes = 0
+        rollouts = 0
+
+        while nodes < max_nodes:
+            if rollouts < len(candidates):
+                index = rollouts
+            else:
+                log_rollouts = math.log(rollouts)
+                index = max(
+                    range(len(candidates)),
+                    key=lambda i: totals[i] / visits[i]
+                    + EXPLORATION * math.sqrt(log_rollouts / visits[i]),
+                )
+            value, frames = self._rollout(root, candidates[index], deadline)
+            nodes += frames
+            if value is None:
+                break
+            visits[index] += 1
+            totals[index] += value
+            rollouts += 1
+
+        elapsed = self.clock() - start
+        self.searches += 1
+        self.rollouts += rollouts
+        self.nodes += nodes
+        self.search_time += elapsed
+        self.max_search_time = max(self.max_search_time, elapsed)
+
+        if rollouts == 0:
+            return rest or [0]
+        best = max(
+            (i for i in range(len(candidates)) if visits[i] > 0),
+            key=lambda i: totals[i] / visits[i],
         )
+        return candidates[best]
 
-    def _is_under(self):
-        return (self.playerb.rect.centery > self.playera.rect.centery) & self._is_close(
-            50
-        )
+    def _rollout(self, root, sequence, deadline):
+        """Plays sequence from root on the shadow match and scores the result.
 
-    def _near_right_edge(self):
-        return abs(
-            self.playerb.rect.x - self.playerb.screen.get_width()
-        ) < self.playera.scale(100)
+        Returns:
+            tuple: (score, or None if the deadline passed, simulated frames)
+        """
 
-    def _near_left_edge(self):
-        return abs(self.playerb.rect.x - 0) < self.playera.scale(100)
+        shadow = self.shadow
+        opponent, fighter = shadow.player1, shadow.player2
+        shadow.restore(root)
+        life = fighter.life - opponent.life
+        opponent_sequence = ()
+        opponent_index = 0
+
+        frames = max(len(sequence), SEARCH_HORIZON)
+        for frame in range(frames):
+            if (deadline is not None) and (self.clock() > deadline):
+                return None, frame
+            if opponent_index >= len(opponent_sequence):
+                opponent_sequence = self.random.choice(self.sequence_list)
+                opponent_index = 0
+            bits = sequence[frame] if frame < len(sequence) else 0
+            shadow.tick(opponent_sequence[opponent_index], bits)
+            opponent_index += 1
+            if (fighter.life <= 0) | (opponent.life <= 0):
+                return self._evaluate(life), frame + 1
+
+        return self._evaluate(life), frames
+
+    def _evaluate(self, life):
+        """Scores the shadow match for the AI, life is the lead it started with."""
+
+        opponent, fighter = self.shadow.player1, self.shadow.player2
+        score = LIFE_WEIGHT * (fighter.life - opponent.life - life)
+        score += STAMINA_WEIGHT * (fighter.stamina - opponent.stamina)
+        score -= (
+            DISTANCE_WEIGHT
+            * abs(fighter.rect.centerx - opponent.rect.centerx)
+            / fighter.width
+        )
+        return score
+
+    def stats(self):
+        """Returns the search scheme's node counts and thinking times."""
+
+        return {
+            "searches": self.searches,
+            "rollouts": self.rollouts,
+            "nodes": self.nodes,
+            "nodes_per_second": self.nodes / max(self.search_time, 1e-9),
+            "search_ms_mean": 1000 * self.search_time / max(1, self.searches),
+            "search_ms_max": 1000 * self.max_search_time,
+        }
 
-    def _has_stamina(self, min=1):
-        return self.playerb.stamina >= min
+    def format_stats(self):
+        stats = self.stats()
+        return (
+            f"{stats['searches']} searches, {stats['rollouts']} rollouts, "
+            f"{stats['nodes']} nodes, {stats['nodes_per_second']:,.0f} nodes/s, "
+            f"search {stats['search_ms_mean']:.3f} ms mean "
+            f"{stats['search_ms_max']:.3f} ms max"
+        )
@@ -0,0 +1,281 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import warnings
+
+import pygame
+
+from src.assets import ASSETS
+from src.audio import SOUND_FILES, SOUNDS
+from src.moves import compile_moves
+from src.simulation import scale, scaler, screen_scale_factor
+
+PACK_DIR = "sprites/packs"
+INDEX_FILE = "index.json"
+VERSION = 1
+
+# screen sizes packs are built for by default
+PACK_SIZES = ((960, 540), (1280, 720), (1920, 1080), (2560, 1440), (3840, 2160))
+
+# HUD surfaces the game requests from ASSETS: path and size on the 960x540
+# design grid. The fighter sprites are sized by the moves, see sprite_keys()
+HUD_SPRITES = (
+    ("sprites/blue_heart.png", (30, 30)),
+    ("sprites/red_heart.png", (30, 30)),
+    ("sprites/stamina.png", (60, 60)),
+)
+
+# byte order of the atlas pixels for each set of (R, G, B, A) masks
+PIXEL_FORMATS = {
+    (0xFF0000, 0xFF00, 0xFF, 0xFF000000): "BGRA",
+    (0xFF, 0xFF00, 0xFF0000, 0xFF000000): "RGBA",
+}
+
+
+def size_name(screen_size):
+    return "x".join(map(str, screen_size))
+
+
+def sprite_keys(screen_size):
+    """Returns every (path, size, flip, rotation) the game requests from ASSETS.
+
+    Player sprites are sized like the hitboxes compiled from moves.json,
+    so a pack built before the moves changed has different keys.
+    """
+
+    scale_factor = screen_scale_factor(screen_size)
+    frames = compile_moves(scaler(scale_factor))
+    keys = []
+    for path in ("sprites/blue_player.png", "sprites/red_player.png"):
+        keys += [(path, frames.body_size, False, 0), (path, frames.body_size, True, 0)]
+    keys += [
+        ("sprites/sword.png", frames.sword_size, False, 0),
+        ("sprites/sword.png", frames.sword_size, True, 0),
+        ("sprites/sword.png", frames.sword_size, False, -90),
+        ("sprites/shield.png", frames.shield_size, False, 0),
+        ("sprites/shield.png", frames.shield_size, True, 0),
+    ]
+    keys += [
+        (path, tuple(scale(size, scale_factor)), False, 0) for path, size in HUD_SPRITES
+    ]
+    return keys
+
+
+def _alpha_format():
+    """Returns the pixel format convert_alpha() produces on this display."""
+
+    masks = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha().get_masks()
+    return PIXEL_FORMATS.get(tuple(masks))
+
+
+def _shelf_pack(sizes, width):
+    """Places rects on rows of a fixed width, tallest first.
+
+    Returns:
+        tuple: (x, y) per size in input order, and the total height
+    """
+
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def build_sprite_pack(screen_size, directory=PACK_DIR):
+    """Writes the sprites of screen_size into one raw atlas file.
+
+    The sprites are made by ASSETS exactly like in the game, then copied
+    row by row into a buffer in the display's alpha pixel format.
+
+    Returns:
+        dict: index entry of the atlas
+    """
+
+    pixel_format = _alpha_format()
+    if pixel_format is None:
+        raise RuntimeError("unsupported display pixel format")
+
+    keys = sprite_keys(screen_size)
+    surfaces = [ASSETS.surface(*key) for key in keys]
+    sizes = [surface.get_size() for surface in surfaces]
+
+    width = max(
+        max(w for w, _ in sizes), math.ceil(math.sqrt(sum(w * h for w, h in sizes)))
+    )
+    positions, height = _shelf_pack(sizes, width)
+
+    pixels = bytearray(4 * width * height)
+    for surface, (x, y) in zip(surfaces, positions):
+        w, h = surface.get_size()
+        data = pygame.image.tobytes(surface, pixel_format)
+        for row in range(h):
+            start = 4 * ((y + row) * width + x)
+            pixels[start : start + 4 * w] = data[4 * w * row : 4 * w * (row + 1)]
+
+    name = f"sprites-{size_name(screen_size)}.{pixel_format.lower()}"
+    with open(os.path.join(directory, name), "wb") as f:
+        f.write(pixels)
+
+    return {
+        "file": name,
+        "size": [width, height],
+        "format": pixel_format,
+        "entries": [
+            [path, list(size), flip, rotation, [x, y, *surface_size]]
+            for (path, size, flip, rotation), (x, y), surface_size in zip(
+                keys, positions, sizes
+            )
+        ],
+    }
+
+
+def build_sound_pack(directory=PACK_DIR):
+    """Writes every sound decoded to the mixer's raw PCM format into one file.
+
+    Returns:
+        dict: index entry of the sounds
+    """
+
+    mixer = pygame.mixer.get_init()
+    frequency, size, channels = mixer
+    name = f"sounds-{frequency}hz-{abs(size)}bit-{channels}ch.pcm"
+    entries = {}
+    offset = 0
+    with open(os.path.join(directory, name), "wb") as f:
+        for sound_name, (path, _) in SOUND_FILES.items():
+            raw = pygame.mixer.Sound(path).get_raw()
+            f.write(raw)
+            entries[sound_name] = [offset, len(raw)]
+            offset += len(raw)
+    return {"file": name, "mixer": list(mixer), "entries": entries}
+
+
+def build(screen_sizes=PACK_SIZES, directory=PACK_DIR):
+    """Builds the sprite atlases of screen_sizes, the sound pack and the index."""
+
+    os.makedirs(directory, exist_ok=True)
+    index = {
+        "version": VERSION,
+        "sprites": {
+            size_name(size): build_sprite_pack(size, directory) for size in screen_sizes
+        },
+        "sounds": build_sound_pack(directory),
+    }
+    with open(os.path.join(directory, INDEX_FILE), "w") as f:
+        json.dump(index, f)
+    return index
+
+
+def read_index(directory=PACK_DIR):
+    """Returns the pack index, None if no usable pack was built."""
+
+    try:
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != VERSION:
+        return None
+    return index
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_sprite_pack(screen_size, registry=ASSETS, directory=PACK_DIR, index=None):
+    """Registers the packed sprites of screen_size with registry.
+
+    The atlas is memory-mapped and every sprite becomes a subsurface of
+    one surface viewing the mapped pixels, so nothing is decoded, scaled
+    or copied. A pack whose sprite sizes differ from the ones the moves
+    give, because moves.json changed since it was built, is not used.
+
+    Returns:
+        bool: whether a pack for screen_size was found and is up to date
+    """
+
+    index = read_index(directory) if index is None else index
+    if index is None:
+        return False
+    pack = index["sprites"].get(size_name(screen_size))
+    if pack is None:
+        return False
+    packed = {
+        (path, tuple(size), flip, rotation)
+        for path, size, flip, rotation, _ in pack["entries"]
+    }
+    if packed != set(sprite_keys(screen_size)):
+        warnings.warn(
+            f"sprite pack {pack['file']} does not match the sizes in moves.json, "
+            "loading the images instead. Run python -m src.asset_pack to rebuild it"
+        )
+        return False
+
+    pixels = _map(os.path.join(directory, pack["file"]))
+    atlas = pygame.image.frombuffer(pixels, tuple(pack["size"]), pack["format"])
+    if pack["format"] != _alpha_format():
+        atlas = atlas.convert_alpha()
+    registry.packs.append(pixels)
+
+    for path, size, flip, rotation, rect in pack["entries"]:
+        registry.surfaces[(path, tuple(size), flip, rotation)] = atlas.subsurface(rect)
+    return True
+
+
+def load_sound_pack(bank=SOUNDS, directory=PACK_DIR, index=None):
+    """Loads the pre-decoded sounds into bank if they match the mixer format.
+
+    Returns:
+        bool: whether the sounds were loaded
+    """
+
+    index = read_index(directory) if index is None else index
+    if index is None:
+        return False
+    pack = index["sounds"]
+    if tuple(pack["mixer"]) != pygame.mixer.get_init():
+        return False
+
+    pcm = _map(os.path.join(directory, pack["file"]))
+    view = memoryview(pcm)
+    for name, (offset, length) in pack["entries"].items():
+        bank.add(name, pygame.mixer.Sound(buffer=view[offset : offset + length]))
+    view.release()
+    pcm.close()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the asset packs.")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=lambda text: tuple(int(v) for v in text.lower().split("x")),
+        default=PACK_SIZES,
+        help="screen sizes to build sprite atlases for, as WxH",
+    )
+    parser.add_argument("--dir", default=PACK_DIR, help="output directory")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    index = build(args.sizes, args.dir)
+    for size, pack in index["sprites"].items():
+        print(f"{size}: {pack['file']} {pack['size'][0]}x{pack['size'][1]}")
+    print(f"sounds: {index['sounds']['file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+from collections import OrderedDict
+
+import pygame
+
+# every image the game draws
+SPRITE_FILES = (
+    "sprites/blue_player.png",
+    "sprites/red_player.png",
+    "sprites/sword.png",
+    "sprites/shield.png",
+    "sprites/blue_heart.png",
+    "sprites/red_heart.png",
+    "sprites/stamina.png",
+)
+
+
+class AssetRegistry:
+    """Process-wide cache of decoded images and surfaces derived from them.
+
+    Derived surfaces are keyed by (path, size, flip, rotation) and shared
+    by every caller, so they must only ever be blitted, never drawn on.
+    Images can be decoded ahead of time on a thread pool with preload();
+    image() then only waits for the one it needs.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.pending = {}
+        self.surfaces = {}
+        # memory maps of asset packs the cached surfaces may view
+        self.packs = []
+        self.loads = 0
+        self.transforms = 0
+
+    def image(self, path):
+        """Returns the decoded image at path, loading it on first use.
+
+        Args:
+            path (str): image file path
+
+        Returns:
+            pygame.Surface: image converted to the display format
+        """
+
+        image = self.images.get(path)
+        if image is None:
+            future = self.pending.pop(path, None)
+            if future is None:
+                image = pygame.image.load(path)
+            else:
+                image = future.result()
+            # converting needs the display, so it stays on the main thread
+            image = image.convert_alpha()
+            self.images[path] = image
+            self.loads += 1
+        return image
+
+    def preload(self, paths, executor):
+        """Starts decoding the images at paths that are not loaded yet.
+
+        Args:
+            paths (list): image file paths
+            executor (concurrent.futures.Executor): pool to decode on
+        """
+
+        for path in paths:
+            if (path not in self.images) & (path not in self.pending):
+                self.pending[path] = executor.submit(pygame.image.load, path)
+
+    def finish(self):
+        """Waits for every preloaded image."""
+
+        for path in list(self.pending):
+            self.image(path)
+
+    def surface(self, path, size=None, flip=False, rotation=0):
+        """Returns the image at path scaled, then flipped, then rotated.
+
+        Args:
+            path (str): image file path
+            size (tuple): size to scale to, None keeps the image size
+            flip (bool): mirror horizontally
+            rotation (int): rotation in degrees, counterclockwise
+
+        Returns:
+            pygame.Surface: cached derived surface
+        """
+
+        if size is not None:
+            size = tuple(size)
+        key = (path, size, flip, rotation)
+
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if rotation != 0:
+                surface = pygame.transform.rotate(
+                    self.surface(path, size, flip), rotation
+                )
+            elif flip is True:
+                surface = pygame.transform.flip(self.surface(path, size), True, False)
+            elif size is not None:
+                surface = pygame.transform.scale(self.image(path), size)
+            else:
+                return self.image(path)
+            self.surfaces[key] = surface
+            self.transforms += 1
+        return surface
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Keyed by (font, text, color, antialias), so menus and banners that show
+    the same strings every frame only rasterize them once.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias=True, color=(255, 255, 255)):
+        """Returns font.render(text, antialias, color), cached.
+
+        Args:
+            font (pygame.font.Font): font to render with
+            text (str): text to render
+            antialias (bool): smooth edges
+            color (tuple): text color
+
+        Returns:
+            pygame.Surface: rendered text
+        """
+
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = font.render(text, antialias, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.maxsize:
+                self.surfaces.popitem(last=False)
+        else:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+ASSETS = AssetRegistry()
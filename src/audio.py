@@ -0,0 +1,128 @@
+import pygame
+
+# sound name to file and volume
+SOUND_FILES = {
+    "jump": ("sprites/sounds/jump.mp3", 1.0),
+    "land": ("sprites/sounds/land.mp3", 1.0),
+    "dash": ("sprites/sounds/dash.mp3", 1.0),
+    "shield": ("sprites/sounds/shield.mp3", 1.0),
+    "sword_swoosh": ("sprites/sounds/sword_swoosh.wav", 1.0),
+    "sword_hit_ground": ("sprites/sounds/sword_hit_ground.wav", 1.0),
+    "sword_hit": ("sprites/sounds/sword_hit.mp3", 1.0),
+    "sword_hit_shield": ("sprites/sounds/sword_hit_shield.wav", 0.3),
+}
+
+# most channels one sound may play on at the same time
+MAX_VOICES = 2
+
+
+class SoundBank:
+    """Process-wide cache of decoded sounds, shared by every player and match.
+
+    Sounds are decoded on first use, or ahead of time by preload(), and
+    are kept across restarts.
+    """
+
+    def __init__(self, files=SOUND_FILES):
+        self.files = files
+        self.sounds = {}
+        self.pending = {}
+        self.loads = 0
+
+    def sound(self, name):
+        """Returns the sound called name, loading it on first use.
+
+        Args:
+            name (str): key of SOUND_FILES
+
+        Returns:
+            pygame.mixer.Sound: decoded sound
+        """
+
+        sound = self.sounds.get(name)
+        if sound is None:
+            path, volume = self.files[name]
+            future = self.pending.pop(name, None)
+            if future is None:
+                sound = pygame.mixer.Sound(path)
+            else:
+                sound = future.result()
+            self.add(name, sound)
+            self.loads += 1
+        return sound
+
+    def add(self, name, sound):
+        """Stores an already decoded sound, e.g. from an asset pack."""
+
+        sound.set_volume(self.files[name][1])
+        self.sounds[name] = sound
+        self.pending.pop(name, None)
+
+    def preload(self, executor=None):
+        """Decodes every sound that is not loaded yet.
+
+        Args:
+            executor (concurrent.futures.Executor): pool to decode on in the
+                background, None decodes them now
+        """
+
+        for name, (path, _) in self.files.items():
+            if (name in self.sounds) | (name in self.pending):
+                continue
+            if executor is None:
+                self.sound(name)
+            else:
+                self.pending[name] = executor.submit(pygame.mixer.Sound, path)
+
+    def finish(self):
+        """Waits for every sound preloaded in the background."""
+
+        for name in list(self.pending):
+            self.sound(name)
+
+
+class AudioQueue:
+    """Collects the sounds triggered during a frame and plays them once.
+
+    The simulation only calls emit(), which records the name. drain() runs
+    once per frame and plays each name once, however often it was
+    triggered, unless the sound is already playing on max_voices channels.
+    Headless matches have no queue, so their sounds cost nothing.
+    """
+
+    def __init__(self, bank, max_voices=MAX_VOICES):
+        self.bank = bank
+        self.max_voices = max_voices
+        self.muted = False
+        self.events = {}
+        self.played = 0
+        self.merged = 0
+        self.capped = 0
+
+    def emit(self, name):
+        """Queues the sound called name for the end of the frame."""
+
+        if self.muted is False:
+            if name in self.events:
+                self.merged += 1
+            self.events[name] = None
+
+    def drain(self):
+        """Plays the queued sounds and empties the queue."""
+
+        for name in self.events:
+            sound = self.bank.sound(name)
+            if sound.get_num_channels() < self.max_voices:
+                sound.play()
+                self.played += 1
+            else:
+                self.capped += 1
+        self.events.clear()
+
+    def clear(self):
+        """Drops the queued sounds without playing them."""
+
+        self.events.clear()
+
+
+SOUNDS = SoundBank()
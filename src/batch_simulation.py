@@ -0,0 +1,527 @@
+import numpy as np
+
+from src.simulation import ACTIONS, BASE_FPS, Match, scale, screen_scale_factor
+
+PRESS_LEFT = 1
+PRESS_RIGHT = 2
+
+
+class BatchMatch:
+    """Steps many 1v1 matches in lockstep with NumPy arrays.
+
+    Every piece of Fighter state is stored as an array of shape (2, n),
+    row 0 for player 1 and row 1 for player 2, and each rule of
+    Fighter.update and Match is applied to all matches at once with masks.
+    The constants are taken from a scalar Match so both stay in sync.
+    """
+
+    def __init__(self, n, screen_size=(960, 540), fps=BASE_FPS):
+        self.n = n
+        self.screen_size = screen_size
+        self.fps = fps
+
+        proto = Match.headless(screen_size, fps)
+        p1, p2 = proto.player1, proto.player2
+        if proto.base_ticks != 1:
+            # collisions are not swept, and falls and i-frames use base ticks
+            raise ValueError(f"BatchMatch only steps at {BASE_FPS} fps")
+        scale_factor = screen_scale_factor(screen_size)
+
+        # constants
+        self.width = p1.width
+        self.ground = p1.ground
+        self.w, self.h = p1.rect.size
+        self.sword_w, self.sword_h = p1.sword_rect.size
+        self.ds_w, self.ds_h = p1.downstrike_rect.size
+        self.shield_w, self.shield_h = p1.shield_rect.size
+        self.speed = p1.speed
+        self.jump_speed = np.array(p1.jump_speed, dtype=np.int64)
+        self.jump_fps_time = p1.jump_fps_time
+        self.initial_fall_speed = p1.initial_fall_speed
+        self.max_fall_ticker = p1.frames.max_fall_ticker
+        self.press_time_fps = p1.press_fps_time
+        self.dash_speed = np.array(p1.dash_speed, dtype=np.int64)
+        self.dash_fps_time = p1.dash_fps_time
+        self.knockback_time_fps = p1.knockback_fps_time
+        self.sword_fps_time = p1.sword_fps_time
+        self.sword_come_out_time = p1.sword_come_out_time
+        self.sword_come_in_time = p1.sword_come_in_time
+        self.sword_offsety = p1.sword_offsety
+        self.downstrike_offsetx = p1.downstrike_offsetx
+        self.downstrike_offsety = p1.downstrike_offsety
+        self.land_downstrike_stun_time_long = p1.land_downstrike_stun_time_long
+        self.land_downstrike_stun_time_short = p1.land_downstrike_stun_time_short
+        self.shield_offsety = p1.shield_offsety
+        self.shield_fps_time = p1.shield_fps_time
+        self.stamina_reload_time_fps = p1.stamina_reload_fps_time
+        self.i_frames_time = p1.i_frames_time
+        self.edge_margin = scale(30, scale_factor)
+        # offsets only depend on facing, index 0 right, index 1 left
+        right, left = (p1, p2) if p1.facing_left is False else (p2, p1)
+        self.sword_offsets = np.array(
+            [right.sword_offsetx, left.sword_offsetx], dtype=np.int64
+        )
+        self.shield_offsets = np.array(
+            [right.shield_offsetx, left.shield_offsetx], dtype=np.int64
+        )
+
+        def column(attr, dtype):
+            return np.array(
+                [[getattr(p1, attr)] * n, [getattr(p2, attr)] * n], dtype=dtype
+            )
+
+        # rects
+        self.x = np.array([[p1.rect.x] * n, [p2.rect.x] * n], dtype=np.int64)
+        self.y = np.array([[p1.rect.y] * n, [p2.rect.y] * n], dtype=np.int64)
+        self.sword_x = np.array(
+            [[p1.sword_rect.x] * n, [p2.sword_rect.x] * n], dtype=np.int64
+        )
+        self.sword_y = np.array(
+            [[p1.sword_rect.y] * n, [p2.sword_rect.y] * n], dtype=np.int64
+        )
+        self.ds_x = np.array(
+            [[p1.downstrike_rect.x] * n, [p2.downstrike_rect.x] * n], dtype=np.int64
+        )
+        self.ds_y = np.array(
+            [[p1.downstrike_rect.y] * n, [p2.downstrike_rect.y] * n], dtype=np.int64
+        )
+        self.shield_x = np.array(
+            [[p1.shield_rect.x] * n, [p2.shield_rect.x] * n], dtype=np.int64
+        )
+        self.shield_y = np.array(
+            [[p1.shield_rect.y] * n, [p2.shield_rect.y] * n], dtype=np.int64
+        )
+
+        # movement and counters
+        self.X_change = column("X_change", np.int64)
+        self.Y_change = column("Y_change", np.int64)
+        self.jumping = column("jumping", bool)
+        self.jump_counter = column("jump_counter", np.int64)
+        self.falling = column("falling", bool)
+        self.fall_ticker = column("fall_ticker", np.int64)
+        self.on_top = column("on_top", bool)
+        self.most_recent_press = np.zeros((2, n), dtype=np.int64)
+        self.press_state = column("press_state", np.int64)
+        self.press_timer = column("press_timer", np.float64)
+        self.dashing = column("dashing", bool)
+        self.dash_mod = column("dash_mod", np.int64)
+        self.dash_counter = column("dash_counter", np.int64)
+        self.knockback = column("knockback", bool)
+        self.knockback_counter = column("knockback_counter", np.float64)
+        self.knockback_speed = column("knockback_speed", np.int64)
+        self.sword_hurtbox = column("sword_hurtbox", bool)
+        self.striking = column("striking", bool)
+        self.striking_counter = np.zeros((2, n), dtype=np.float64)
+        self.downstriking = column("downstriking", bool)
+        self.land_downstrike_stun = column("land_downstrike_stun", bool)
+        self.land_downstrike_timer = np.zeros((2, n), dtype=np.int64)
+        self.shielding = column("shielding", bool)
+        self.shield_block = column("shield_block", bool)
+        self.shield_counter = np.zeros((2, n), dtype=np.float64)
+        self.max_stamina = column("max_stamina", np.int64)
+        self.stamina = column("stamina", np.int64)
+        self.stamina_reload_counter = column("stamina_reload_counter", np.float64)
+        self.life = column("life", np.int64)
+        self.invinsible = column("invinsible", bool)
+        self.i_frames = column("i_frames", np.int64)
+        self.i_frames_invinsible = column("i_frames_invinsible", bool)
+        self.facing_left = column("facing_left", bool)
+
+        self.game_over = np.zeros(n, dtype=bool)
+        self.result = np.full(n, -1, dtype=np.int64)
+        self.frame = 0
+
+    def step(self, inputs):
+        """Advances every match by one frame.
+
+        Args:
+            inputs (np.ndarray): uint8 bitmasks of shape (2, n), bit i is ACTIONS[i]
+
+        Returns:
+            np.ndarray: winning player number per match, 0 for a draw, -1 if not over
+        """
+
+        result = self.check_game_over()
+        self.handle_input(inputs)
+        for p in (0, 1):
+            self._update(p)
+        self.handle_collisions()
+        self.movement()
+        self.frame += 1
+        return result
+
+    def check_game_over(self):
+        """Ends matches where a player ran out of lives, like Match.check_game_over."""
+
+        dead1 = self.life[0] <= 0
+        dead2 = self.life[1] <= 0
+        result = np.full(self.n, -1, dtype=np.int64)
+        result[dead1 & ~dead2] = 2
+        result[dead2 & ~dead1] = 1
+        result[dead1 & dead2] = 0
+
+        np.copyto(self.y[0], -2000, where=dead1)
+        np.copyto(self.knockback[0], True, where=dead1)
+        np.copyto(self.y[1], -2000, where=dead2)
+        np.copyto(self.knockback[1], True, where=dead2)
+
+        over = result >= 0
+        self.game_over |= over
+        np.copyto(self.result, result, where=over)
+        return result
+
+    # input
+
+    def handle_input(self, inputs):
+        inputs = np.asarray(inputs)
+        for p in (0, 1):
+            keys = [((inputs[p] >> bit) & 1).astype(bool) for bit in range(6)]
+            self._player_movement(p, *keys)
+
+    def _player_movement(self, p, jump, left, right, down, sword, shield):
+        ready = ~self.knockback[p] & ~self.land_downstrike_stun[p]
+
+        # left movement
+        m = ready & left
+        self._flip(p, m & ~self.facing_left[p])
+        np.copyto(self.X_change[p], -self.speed, where=m)
+        self._check_dash(p, m, PRESS_LEFT)
+
+        # right movement
+        m = ready & right
+        self._flip(p, m & self.facing_left[p])
+        np.copyto(self.X_change[p], self.speed, where=m)
+        self._check_dash(p, m, PRESS_RIGHT)
+
+        self._deploy_jump(p, ready & jump)
+        self._deploy_downstrike(p, ready & down)
+        self._deploy_strike(p, ready & sword)
+        self._deploy_shield(p, ready & shield)
+
+        # stopping
+        np.copyto(self.X_change[p], 0, where=ready & right & left)
+        m = ready & ~right & ~left
+        np.copyto(self.X_change[p], 0, where=m)
+        self._check_dash(p, m, None)
+
+    def _flip(self, p, m):
+        self.facing_left[p] ^= m
+        self.dash_mod[p] = np.where(m, -self.dash_mod[p], self.dash_mod[p])
+
+    def _check_dash(self, p, m, press):
+        press_state = self.press_state[p]
+        press_timer = self.press_timer[p]
+        if press is not None:
+            start = m & (press_state == 0)
+            press_state[start] = 1
+            np.copyto(press_timer, self.press_time_fps, where=start)
+            self.most_recent_press[p][start] = press
+
+            second = m & (press_state == 2)
+            self._deploy_dash(
+                p, second & (press_timer > 0) & (self.most_recent_press[p] == press)
+            )
+            press_state[second] = 0
+        else:
+            press_state[m & (press_state == 1)] = 2
+        press_state[m & (press_timer == 0)] = 0
+
+    def _is_acting(self, p):
+        return (
+            self.striking[p]
+            | self.downstriking[p]
+            | self.shielding[p]
+            | self.dashing[p]
+        )
+
+    def _spend_stamina(self, p, m):
+        self.stamina[p] -= m
+        np.copyto(self.stamina_reload_counter[p], self.stamina_reload_time_fps, where=m)
+
+    def _deploy_jump(self, p, m):
+        m = m & ~self.jumping[p] & ~self.falling[p]
+        self.jumping[p] |= m
+        np.copyto(self.jump_counter[p], self.jump_fps_time, where=m)
+
+    def _deploy_dash(self, p, m):
+        m = m & ~self._is_acting(p) & (self.stamina[p] > 0)
+        np.copyto(self.X_change[p], self.dash_speed[0] * self.dash_mod[p], where=m)
+        np.copyto(self.dash_counter[p], self.dash_fps_time, where=m)
+        self.dashing[p] |= m
+        self._spend_stamina(p, m)
+
+    def _deploy_downstrike(self, p, m):
+        m = m & ~self._is_acting(p) & (self.stamina[p] > 0)
+        m &= self.jumping[p] | self.falling[p]
+        np.copyto(self.X_change[p], 0, where=m)
+        self.jumping[p] &= ~m
+        self.downstriking[p] |= m
+        self._spend_stamina(p, m)
+
+    def _deploy_strike(self, p, m):
+        m = m & ~self._is_acting(p) & (self.stamina[p] > 0)
+        self.striking[p] |= m
+        np.copyto(self.striking_counter[p], self.sword_fps_time, where=m)
+        self._spend_stamina(p, m)
+
+    def _deploy_shield(self, p, m):
+        m = m & ~self._is_acting(p) & (self.stamina[p] > 0)
+        self.shielding[p] |= m
+        np.copyto(self.shield_counter[p], self.shield_fps_time, where=m)
+        self._spend_stamina(p, m)
+        np.copyto(self.X_change[p], 0, where=m)
+
+    def _deploy_knockback(self, p, m):
+        m = m & ~self.knockback[p]
+        self.knockback[p] |= m
+        np.copyto(self.X_change[p], self.knockback_speed[p], where=m)
+        np.copyto(self.knockback_counter[p], self.knockback_time_fps, where=m)
+
+    # update
+
+    def _update(self, p):
+        """Vectorized Fighter.update for player row p."""
+
+        X_change, Y_change = self.X_change[p], self.Y_change[p]
+
+        # knockback
+        m = self.knockback[p]
+        self.knockback_counter[p] -= m
+        done = m & (self.knockback_counter[p] <= 0)
+        self.knockback[p] &= ~done
+        np.copyto(X_change, 0, where=done)
+        np.copyto(X_change, self.knockback_speed[p], where=m & ~done)
+
+        # dash
+        m = self.dashing[p]
+        counter = self.dash_counter[p]
+        done = m & (counter <= 0)
+        self.dashing[p] &= ~done
+        np.copyto(X_change, 0, where=done)
+        m = m & ~done
+        timer = np.clip(self.dash_fps_time - counter, 0, self.dash_fps_time - 1)
+        np.copyto(X_change, self.dash_speed[timer] * self.dash_mod[p], where=m)
+        counter -= m
+
+        # jump
+        m = self.jumping[p]
+        counter = self.jump_counter[p]
+        done = m & (counter <= 0)
+        self.jumping[p] &= ~done
+        m = m & ~done
+        timer = np.clip(self.jump_fps_time - counter, 0, self.jump_fps_time - 1)
+        np.copyto(Y_change, self.jump_speed[timer], where=m)
+        counter -= m
+
+        # fall
+        bottom = self.y[p] + self.h
+        m = (bottom < self.ground) & ~self.jumping[p] & ~self.on_top[p]
+        m &= ~self.falling[p]
+        self.falling[p] |= m
+        np.copyto(self.fall_ticker[p], 1, where=m)
+
+        landed = (bottom == self.ground) | self.on_top[p]
+        self.falling[p] &= ~landed
+        np.copyto(Y_change, 0, where=landed & (Y_change >= 0))
+        m = self.falling[p]
+        self.fall_ticker[p] += m & (self.fall_ticker[p] < self.max_fall_ticker)
+        np.copyto(Y_change, self.initial_fall_speed * self.fall_ticker[p], where=m)
+
+        # stamina
+        m = (self.stamina[p] < self.max_stamina[p]) & ~self.jumping[p]
+        self.stamina_reload_counter[p] -= m
+        m &= self.stamina_reload_counter[p] <= 0
+        self.stamina[p] += m
+        np.copyto(self.stamina_reload_counter[p], self.stamina_reload_time_fps, where=m)
+
+        # strike
+        sword_offsetx = self.sword_offsets[self.facing_left[p].astype(np.int64)]
+        m = self.striking[p]
+        counter = self.striking_counter[p]
+        counter -= m
+        active = (self.sword_come_in_time < counter) & (
+            counter < self.sword_come_out_time
+        )
+        np.copyto(self.sword_x[p], self.x[p] + sword_offsetx, where=m & active)
+        np.copyto(self.sword_y[p], self.y[p] - self.sword_offsety, where=m & active)
+        np.copyto(self.sword_hurtbox[p], active, where=m)
+        self.striking[p] &= ~(m & (counter <= 0))
+
+        # downstrike
+        m = self.downstriking[p]
+        air = m & self.falling[p]
+        np.copyto(X_change, 0, where=air)
+        np.copyto(self.ds_x[p], self.x[p] + self.downstrike_offsetx, where=air)
+        np.copyto(self.ds_y[p], self.y[p] - self.downstrike_offsety, where=air)
+        land = m & ~self.falling[p]
+        self.downstriking[p] &= ~land
+        self.land_downstrike_stun[p] |= land
+        stun_time = np.where(
+            self.on_top[p],
+            self.land_downstrike_stun_time_short,
+            self.land_downstrike_stun_time_long,
+        )
+        np.copyto(self.land_downstrike_timer[p], stun_time, where=land)
+        np.copyto(X_change, 0, where=land)
+
+        # land downstrike
+        m = self.land_downstrike_stun[p]
+        timer = self.land_downstrike_timer[p]
+        counting = m & (timer > 0)
+        timer -= counting
+        self.land_downstrike_stun[p] &= ~(m & ~counting)
+
+        # shield
+        shield_offsetx = self.shield_offsets[self.facing_left[p].astype(np.int64)]
+        m = self.shielding[p]
+        self.shield_counter[p] -= m
+        np.copyto(self.shield_x[p], self.x[p] + shield_offsetx, where=m)
+        np.copyto(self.shield_y[p], self.y[p] - self.shield_offsety, where=m)
+        self.shield_block[p] |= m
+        done = m & (self.shield_counter[p] <= 0)
+        self.shielding[p] &= ~done
+        self.shield_block[p] &= ~done
+
+        # iframes
+        m = self.i_frames_invinsible[p]
+        self.i_frames[p] -= m
+        done = m & (self.i_frames[p] <= 0)
+        self.invinsible[p] &= ~done
+        self.i_frames_invinsible[p] &= ~done
+        np.copyto(self.i_frames[p], self.i_frames_time, where=done)
+
+        # dash timer
+        self.press_timer[p] -= self.press_timer[p] > 0
+
+    def movement(self):
+        self.x += self.X_change
+        self.y += self.Y_change
+
+        np.copyto(self.x, 0, where=self.x <= 0)
+        right = self.x + self.w >= self.width
+        np.copyto(self.x, self.width - self.w, where=(self.x > 0) & right)
+        np.copyto(self.y, self.ground - self.h, where=self.y + self.h > self.ground)
+
+    # collisions
+
+    @staticmethod
+    def _overlap(ax, ay, aw, ah, bx, by, bw, bh):
+        return (ax < bx + bw) & (bx < ax + aw) & (ay < by + bh) & (by < ay + ah)
+
+    def handle_collisions(self):
+        """Handles collisions from both players and swords."""
+
+        self._calc_sword_collisions(0, 1)
+        self._calc_sword_collisions(1, 0)
+
+        collide = self._overlap(
+            self.x[0], self.y[0], self.w, self.h, self.x[1], self.y[1], self.w, self.h
+        )
+        self._calc_player_collision(0, 1, collide)
+        self._calc_player_collision(1, 0, collide)
+        self.on_top &= collide
+
+        self._calc_downstrike_collisions(0, 1)
+        self._calc_downstrike_collisions(1, 0)
+
+    def _calc_player_collision(self, a, b, m):
+        on_top = np.abs(self.y[a] + self.h - self.y[b]) < self.edge_margin
+        np.copyto(self.on_top[a], on_top, where=m)
+
+        side = m & ~self.on_top[a] & ~self.on_top[b] & (self.x[a] < self.x[b])
+        np.copyto(self.X_change[a], 0, where=side & (self.X_change[a] > 0))
+        np.copyto(self.X_change[b], 0, where=side & (self.X_change[b] < 0))
+
+        # if player a is above player b
+        above = m & (self.y[a] < self.y[b])
+        np.copyto(self.Y_change[a], 0, where=above & (self.Y_change[a] > 0))
+        np.copyto(self.Y_change[b], 0, where=above & (self.Y_change[b] < 0))
+
+        np.copyto(self.y[a], self.y[b] + 1 - self.h, where=m & self.on_top[a])
+
+    def _calc_sword_collisions(self, a, b):
+        m = self.sword_hurtbox[a]
+        body = m & self._overlap(
+            self.sword_x[a],
+            self.sword_y[a],
+            self.sword_w,
+            self.sword_h,
+            self.x[b],
+            self.y[b],
+            self.w,
+            self.h,
+        )
+        shield = (
+            m
+            & self.shielding[b]
+            & self._overlap(
+                self.sword_x[a],
+                self.sword_y[a],
+                self.sword_w,
+                self.sword_h,
+                self.shield_x[b],
+                self.shield_y[b],
+                self.shield_w,
+                self.shield_h,
+            )
+        )
+
+        # calc left/right for knockback
+        centera = self.x[a] + self.w // 2
+        centerb = self.x[b] + self.w // 2
+        left = centera < centerb
+        speed = np.abs(self.knockback_speed[b])
+        np.copyto(self.knockback_speed[b], np.where(left, speed, -speed), where=m)
+        np.copyto(self.knockback_speed[a], np.where(left, -speed, speed), where=m)
+
+        # hit shield and not player
+        self._do_shield_hit(a, shield & ~body)
+
+        # hit player
+        right = centera > centerb
+        blocked = (left & self.facing_left[b]) | (right & ~self.facing_left[b])
+        blocked &= self.shield_block[b]
+        self._do_shield_hit(a, body & (left | right) & blocked)
+        self._do_hit(b, body & (left | right) & ~blocked)
+
+    def _calc_downstrike_collisions(self, a, b):
+        m = self.downstriking[a] & self._overlap(
+            self.ds_x[a],
+            self.ds_y[a],
+            self.ds_w,
+            self.ds_h,
+            self.x[b],
+            self.y[b],
+            self.w,
+            self.h,
+        )
+        self._do_hit(b, m, knockback=False)
+
+    def _do_hit(self, p, m, knockback=True):
+        m = m & ~self.invinsible[p]
+        self.life[p] -= m
+        if knockback is True:
+            self._deploy_knockback(p, m)
+        self.invinsible[p] |= m
+        self.i_frames_invinsible[p] |= m
+        np.copyto(self.i_frames[p], self.i_frames_time, where=m)
+
+    def _do_shield_hit(self, p, m):
+        m = m & ~self.knockback[p]
+        np.copyto(self.stamina[p], 0, where=m)
+        self._deploy_knockback(p, m)
+
+
+def random_inputs(rng, n, hold=8):
+    """Returns a generator of (2, n) input bitmasks held for random durations."""
+
+    inputs = np.zeros((2, n), dtype=np.uint8)
+    while True:
+        change = rng.integers(0, hold, size=(2, n)) == 0
+        fresh = rng.integers(0, 64, size=(2, n), dtype=np.uint8)
+        # favour single actions so fights actually happen
+        fresh &= rng.choice(
+            np.array([1, 2, 4, 8, 16, 32, 6, 63], dtype=np.uint8), (2, n)
+        )
+        np.copyto(inputs, fresh, where=change)
+        yield inputs
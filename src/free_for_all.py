@@ -0,0 +1,373 @@
+import argparse
+import random
+import time
+
+from src.ai_enemy import AI_SCHEMES, HEADLESS_SEARCH_NODES, AIEnemy
+from src.simulation import (
+    BASE_FPS,
+    Fighter,
+    Match,
+    scaler,
+    screen_scale_factor,
+)
+
+# distance between neighbouring fighters at the start, on the 960x540 design grid
+SPAWN_SPACING = 120
+
+
+def hitbox_bounds(fighter, swept=False):
+    """Returns the rect around the body and every active attack of fighter.
+
+    A pair of fighters can only interact if these rects overlap: bodies
+    push each other, swords hit bodies and shields, downstrikes hit bodies.
+
+    Args:
+        fighter (Fighter): fighter to bound
+        swept (bool): also cover where the rects move to this tick
+    """
+
+    active = []
+    if fighter.sword_hurtbox is True:
+        active.append(fighter.sword_rect)
+    if fighter.shielding is True:
+        active.append(fighter.shield_rect)
+    if fighter.downstriking is True:
+        active.append(fighter.downstrike_rect)
+    box = fighter.rect.unionall(active) if active else fighter.rect
+    if swept is True:
+        return box.union(box.move(fighter.motion()))
+    return box
+
+
+def overlapping_pairs(boxes, indices):
+    """Brute force reference of SweepAndPrune.pairs(), checks every pair.
+
+    Returns:
+        list: sorted (i, j) index pairs with i < j whose boxes overlap
+    """
+
+    return [
+        (i, j)
+        for n, i in enumerate(indices)
+        for j in indices[n + 1 :]
+        if boxes[i].colliderect(boxes[j])
+    ]
+
+
+class SweepAndPrune:
+    """Broadphase that finds the fighters whose hitboxes may touch.
+
+    The fighters are kept sorted by the left edge of their hitbox_bounds(),
+    and a sweep from left to right only pairs each box with the boxes
+    whose x ranges are still open, then drops pairs that do not overlap
+    vertically. Fighters move little between frames, so re-sorting the
+    previous order is close to linear and so is the sweep, unless many
+    fighters stand in one spot.
+    """
+
+    def __init__(self):
+        self.order = []
+
+    def pairs(self, boxes, indices):
+        """Returns the pairs of indices whose boxes overlap.
+
+        Args:
+            boxes (list): pygame.Rect per fighter
+            indices (list): sorted indices of the fighters taking part
+
+        Returns:
+            list: sorted (i, j) index pairs with i < j
+        """
+
+        if len(self.order) != len(indices):
+            keep = set(indices)
+            self.order = [i for i in self.order if i in keep] or list(indices)
+        self.order.sort(key=lambda i: boxes[i].left)
+
+        pairs = []
+        sweep = []
+        for i in self.order:
+            box = boxes[i]
+            sweep = [j for j in sweep if boxes[j].right > box.left]
+            for j in sweep:
+                if box.colliderect(boxes[j]):
+                    pairs.append((j, i) if j < i else (i, j))
+            sweep.append(i)
+
+        # the per-pair rules are order dependent, so they always run by index
+        pairs.sort()
+        return pairs
+
+
+class FreeForAll(Match):
+    """Rules of a match between any number of fighters, last one standing wins.
+
+    Input, update and movement run per fighter, and the hit, shield block
+    and knockback rules of Match run for every pair the broadphase reports,
+    in the same three passes as a 1v1 match. Pairs whose hitboxes cannot
+    touch are skipped, so a sword only turns the knockback direction of
+    fighters within its reach. Fighters that run out of lives leave the
+    arena and take no further part.
+    """
+
+    def __init__(self, fighters, scale, play_sound=None, broadphase=True):
+        """Creates a match between fighters.
+
+        Args:
+            fighters (list): Fighters taking part, at least two
+            scale (function): scales values from the design grid to screen size
+            play_sound (function): called with the name of a sound to play
+            broadphase (bool): find pairs by sweep and prune instead of
+                checking every pair
+        """
+
+        super().__init__(fighters[0], fighters[1], scale, play_sound)
+        self.fighters = fighters
+        self.alive = list(range(len(fighters)))
+        self.broadphase = SweepAndPrune() if broadphase is True else None
+        self.pairs_checked = 0
+
+    @classmethod
+    def headless(cls, n, screen_size=(960, 540), fps=BASE_FPS, broadphase=True):
+        """Creates a match between n Fighters spread over a virtual arena.
+
+        The arena is as high as screen_size and wide enough to give every
+        fighter SPAWN_SPACING, each fighter faces the centre.
+
+        Returns:
+            FreeForAll: new match
+        """
+
+        match_scale = scaler(screen_scale_factor(screen_size))
+        spacing = match_scale(SPAWN_SPACING)
+        arena_size = (max(screen_size[0], n * spacing), screen_size[1])
+        fighters = []
+        for i in range(n):
+            fighter = Fighter(arena_size, match_scale, fps, facing_left=2 * i >= n)
+            fighter.rect.x = i * spacing + (spacing - fighter.rect.width) // 2
+            fighters.append(fighter)
+        return cls(fighters, match_scale, broadphase=broadphase)
+
+    def snapshot(self):
+        """Returns the match state, including every fighter, as a tuple."""
+
+        return (
+            self.frame,
+            self.game_over,
+            tuple(self.alive),
+            tuple(fighter.snapshot() for fighter in self.fighters),
+        )
+
+    def restore(self, state):
+        """Sets the match state to a snapshot() taken earlier."""
+
+        self.frame, self.game_over, alive, states = state
+        self.alive = list(alive)
+        for fighter, fighter_state in zip(self.fighters, states):
+            fighter.restore(fighter_state)
+
+    def step(self, inputs):
+        """Advances the match by one frame.
+
+        Args:
+            inputs (list): input bitmask per fighter
+
+        Returns:
+            int | None: result of check_game_over before the frame
+        """
+
+        result = self.check_game_over()
+        self.tick(inputs)
+        return result
+
+    def tick(self, inputs):
+        """Advances the match by one frame without checking for game over."""
+
+        self.handle_input(inputs)
+        self.update()
+        self.handle_collisions()
+        self.movement()
+        self.frame += 1
+
+    def check_game_over(self):
+        """Takes fighters without lives out and ends the match at one left.
+
+        Returns:
+            int | None: winning fighter number counting from 1, 0 if the
+                last fighters went out together, None if not over
+        """
+
+        fighters = self.fighters
+        if any(fighters[i].life <= 0 for i in self.alive):
+            for i in self.alive:
+                if fighters[i].life <= 0:
+                    fighters[i].rect.y = -2000
+                    fighters[i].knockback = True
+            self.alive = [i for i in self.alive if fighters[i].life > 0]
+
+        if len(self.alive) > 1:
+            return None
+        self.game_over = True
+        return self.alive[0] + 1 if self.alive else 0
+
+    def handle_input(self, inputs):
+        for i in self.alive:
+            self.player_movement(self.fighters[i], inputs[i])
+
+    def update(self):
+        for i in self.alive:
+            self.fighters[i].update()
+
+    def movement(self):
+        for i in self.alive:
+            self.fighters[i].movement()
+
+    def candidate_pairs(self):
+        """Returns the pairs of living fighters whose hitboxes overlap."""
+
+        swept = self.base_ticks > 1
+        boxes = {i: hitbox_bounds(self.fighters[i], swept) for i in self.alive}
+        if self.broadphase is None:
+            return overlapping_pairs(boxes, self.alive)
+        return self.broadphase.pairs(boxes, self.alive)
+
+    def handle_collisions(self):
+        """Handles collisions between every pair of fighters that may touch.
+
+        Moving fighters to their contact and onto each other can make pairs
+        touch that the broadphase did not report, so it runs again after
+        every pass that moved someone, until no new pairs turn up.
+        """
+
+        fighters = self.fighters
+        index_pairs = self.candidate_pairs()
+        self.pairs_checked += len(index_pairs)
+
+        for i, j in index_pairs:
+            self._calc_sword_collisions(fighters[i], fighters[j])
+            self._calc_sword_collisions(fighters[j], fighters[i])
+
+        # a fighter stays on top if it landed on anyone, not just the last pair
+        on_top = set()
+        resolved = new_pairs = index_pairs
+        while new_pairs:
+            moved = False
+            for i, j in new_pairs:
+                playera, playerb = fighters[i], fighters[j]
+                contact = self._contact(playera.rect, playera, playerb.rect, playerb)
+                if contact is not None:
+                    before = (playera.rect.topleft, playerb.rect.topleft)
+                    self._move_to_contact(contact, playera, playerb)
+                    self._calc_player_collision(playera, playerb)
+                    if playera.on_top is True:
+                        on_top.add(playera)
+                    self._calc_player_collision(playerb, playera)
+                    if playerb.on_top is True:
+                        on_top.add(playerb)
+                    moved |= before != (playera.rect.topleft, playerb.rect.topleft)
+            # snaps can push a fighter into one it was not paired with
+            new_pairs = []
+            if moved is True:
+                seen = set(resolved)
+                new_pairs = [p for p in self.candidate_pairs() if p not in seen]
+                self.pairs_checked += len(new_pairs)
+                resolved = sorted(resolved + new_pairs)
+        for i in self.alive:
+            fighters[i].on_top = fighters[i] in on_top
+
+        for i, j in resolved:
+            playera, playerb = fighters[i], fighters[j]
+            self._calc_downstrike_collisions(playera, playerb)
+            self._calc_downstrike_collisions(playerb, playera)
+
+
+def nearest_opponents(match):
+    """Returns the nearest living opponent of every living fighter.
+
+    Sorting by x puts the nearest opponent next to each fighter, so this
+    stays O(n log n) instead of comparing every pair.
+
+    Returns:
+        dict: fighter index to opponent index
+    """
+
+    fighters = match.fighters
+    order = sorted(match.alive, key=lambda i: fighters[i].rect.centerx)
+    targets = {}
+    for n, i in enumerate(order):
+        x = fighters[i].rect.centerx
+        neighbours = [order[k] for k in (n - 1, n + 1) if 0 <= k < len(order)]
+        if neighbours:
+            targets[i] = min(
+                neighbours, key=lambda j: abs(fighters[j].rect.centerx - x)
+            )
+    return targets
+
+
+def play_free_for_all(
+    n, scheme="heuristic", seed=0, max_frames=36000, screen_size=(960, 540)
+):
+    """Plays one headless free-for-all between n AIs of the same scheme.
+
+    Every AI fights its nearest living opponent, chosen again each frame.
+    The search scheme stops after HEADLESS_SEARCH_NODES, so a seed always
+    plays the same match.
+
+    Returns:
+        tuple: (winning fighter number or 0 for a draw, frames, match)
+    """
+
+    seeds = random.Random(seed)
+    match = FreeForAll.headless(n, screen_size)
+    ais = [
+        AIEnemy(
+            match.fighters[0],
+            fighter,
+            scheme,
+            seed=seeds.getrandbits(32),
+            budget=None,
+            max_nodes=HEADLESS_SEARCH_NODES,
+        )
+        for fighter in match.fighters
+    ]
+    inputs = [0] * n
+
+    result = None
+    while match.frame < max_frames:
+        result = match.check_game_over()
+        if result is not None:
+            break
+        for i, target in nearest_opponents(match).items():
+            ais[i].playera = match.fighters[target]
+            inputs[i] = ais[i].get_input()
+        match.tick(inputs)
+
+    if result is None:
+        result = 0
+    return result, match.frame, match
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless AI free-for-all.")
+    parser.add_argument("--fighters", type=int, default=16)
+    parser.add_argument("--scheme", choices=AI_SCHEMES, default="heuristic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-frames", type=int, default=36000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result, frames, match = play_free_for_all(
+        args.fighters, args.scheme, args.seed, args.max_frames
+    )
+    elapsed = time.perf_counter() - start
+    winner = f"fighter {result}" if result > 0 else "nobody"
+    all_pairs = args.fighters * (args.fighters - 1) // 2
+    print(f"{winner} won after {frames} frames ({elapsed:.1f} s)")
+    print(
+        f"{match.pairs_checked / max(1, frames):.1f} pairs checked per frame "
+        f"of {all_pairs} possible"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+class Layout:
+    """Pixel positions and sizes of the menus, HUD and overlays.
+
+    Everything is scaled from the 960x540 design grid once, when the
+    screen is set up, so drawing a frame only reads ints.
+    """
+
+    def __init__(self, scale, screen_size):
+        """Scales the layout to a screen.
+
+        Args:
+            scale (function): scales values from the design grid to screen size
+            screen_size (tuple): screen size in pixels
+        """
+
+        width = screen_size[0]
+
+        # background and HUD layers
+        self.ground_line = scale(10)
+        self.hud_height = scale(110)
+
+        # sprites
+        self.heart_size = tuple(scale((30, 30)))
+        self.stamina_size = tuple(scale((60, 60)))
+        self.blue_heart = tuple(scale((15, 23)))
+        self.red_heart = tuple(scale((925, 23)))
+        self.stamina_left = tuple(scale((0, 50)))
+        self.stamina_right = tuple(scale((905, 50)))
+
+        # rows of life and stamina boxes, growing inwards from both sides
+        self.box_size = scale(30)
+        self.box_step = scale(30)
+        self.life_y = scale(23)
+        self.stamina_y = scale(70)
+        self.boxes_left = scale(60)
+        self.boxes_right = width - scale(80)
+
+        # text
+        self.title_y = scale(150)
+        self.options_y = scale(225)
+        self.line_gap = scale(1)
+        self.pointer_offset = (scale(2), scale(4))
+
+        # F3 overlay
+        self.profile_pos = tuple(scale((15, 115)))
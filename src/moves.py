@@ -0,0 +1,255 @@
+import copy
+import functools
+import json
+import os
+from array import array
+from collections import namedtuple
+
+# resolution of the frame data in base ticks per second of game time: speeds,
+# velocity curves and frame counts are per base tick, and times in seconds are
+# converted at this rate. It is not the wall-clock tick rate, see
+# BASE_TICK_RATE. A Fighter at a lower fps steps several base ticks at once
+BASE_FPS = 120
+
+# base ticks played per wall-clock second, the speed the moves are tuned for,
+# so a second of game time lasts BASE_FPS / BASE_TICK_RATE seconds on screen
+BASE_TICK_RATE = 60
+
+MOVES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "moves.json")
+
+# keys of every move in the data file. Durations carry their unit in the name,
+# "_seconds" of game time or "_ticks" at BASE_FPS, the rest are distances on
+# the design grid, speeds per base tick or plain counts
+MOVE_KEYS = {
+    "body": ("size", "spawn_x", "walk_speed", "life", "i_frames_ticks"),
+    "jump": ("velocity",),
+    "fall": ("acceleration", "max_ticker"),
+    "dash": ("velocity", "double_tap_seconds"),
+    "knockback": ("time_seconds", "speed"),
+    "sword": (
+        "size",
+        "time_seconds",
+        "startup_seconds",
+        "recovery_seconds",
+        "offset",
+        "flip_offset",
+    ),
+    "downstrike": (
+        "size",
+        "offset",
+        "landing_stun_ticks",
+        "landing_stun_on_top_ticks",
+    ),
+    "shield": ("size", "time_seconds", "offset", "flip_offset"),
+    "stamina": ("max", "reload_seconds"),
+}
+
+# frame data a Fighter copies into its own slots, so the rules read them
+# as plain attributes
+MOVE_CONSTANTS = (
+    "base_ticks",
+    "speed",
+    "jump_speed",
+    "jump_fps_time",
+    "initial_fall_speed",
+    "fall_steps",
+    "press_fps_time",
+    "dash_speed",
+    "dash_fps_time",
+    "knockback_fps_time",
+    "sword_fps_time",
+    "sword_come_out_time",
+    "sword_come_in_time",
+    "sword_offsety",
+    "sword_flip_offset",
+    "downstrike_offsetx",
+    "downstrike_offsety",
+    "land_downstrike_stun_time_long",
+    "land_downstrike_stun_time_short",
+    "shield_offsety",
+    "shield_flip_offset",
+    "shield_fps_time",
+    "stamina_reload_fps_time",
+    "i_frames_time",
+)
+
+# frame data only used when a Fighter is created
+SPAWN_VALUES = (
+    "body_size",
+    "sword_size",
+    "downstrike_size",
+    "shield_size",
+    "spawn_x",
+    "sword_offsetx",
+    "shield_offsetx",
+    "knockback_speed",
+    "max_stamina",
+    "life",
+    "max_fall_ticker",
+)
+
+
+class FrameData(namedtuple("FrameData", MOVE_CONSTANTS + SPAWN_VALUES)):
+    """Moves compiled for one resolution and tick rate, shared by every Fighter.
+
+    Distances are scaled to pixels, times are converted to ticks and
+    velocity curves are read-only views of arrays, so nothing in it can
+    change after compile_moves() built it.
+    """
+
+    __slots__ = ()
+
+
+def resample(values, step):
+    """Sums every step consecutive values of a table of per-tick speeds."""
+
+    return [sum(values[i : i + step]) for i in range(0, len(values), step)]
+
+
+def _curve(values):
+    """Returns an immutable array of per-tick speeds."""
+
+    return memoryview(array("i", values)).toreadonly()
+
+
+def check_moves(moves, path=MOVES_FILE):
+    """Checks that the move definitions have exactly the keys of MOVE_KEYS.
+
+    Raises:
+        ValueError: naming the unknown and missing moves or keys
+    """
+
+    if set(moves) != set(MOVE_KEYS):
+        unknown = sorted(set(moves) - set(MOVE_KEYS))
+        missing = sorted(set(MOVE_KEYS) - set(moves))
+        raise ValueError(f"{path}: unknown moves {unknown}, missing moves {missing}")
+    for name, keys in MOVE_KEYS.items():
+        if set(moves[name]) != set(keys):
+            unknown = sorted(set(moves[name]) - set(keys))
+            missing = sorted(set(keys) - set(moves[name]))
+            raise ValueError(
+                f"{path}: {name} has unknown keys {unknown}, missing keys {missing}"
+            )
+
+
+@functools.lru_cache(maxsize=None)
+def _read_moves(path):
+    """Reads and checks the move definitions, once per file."""
+
+    with open(path) as f:
+        moves = json.load(f)
+    check_moves(moves, path)
+    return moves
+
+
+def load_moves(path=MOVES_FILE):
+    """Returns the checked move definitions of a file.
+
+    Distances are on the 960x540 design grid, speeds per base tick and
+    durations in the unit their key ends in, "_seconds" of game time
+    (BASE_FPS base ticks each) or "_ticks" at BASE_FPS. The file is read
+    once, and every call returns a fresh copy, so changing it does not
+    change the moves compile_moves() sees.
+
+    Returns:
+        dict: move name to its properties
+
+    Raises:
+        ValueError: if a move or key is unknown or missing
+    """
+
+    return copy.deepcopy(_read_moves(path))
+
+
+@functools.lru_cache(maxsize=32)
+def compile_moves(scale, fps=BASE_FPS, path=MOVES_FILE):
+    """Compiles the moves for a resolution and tick rate.
+
+    Results are cached per scale function, so every Fighter created with
+    the same one shares a single FrameData, and the moves are only
+    compiled again when the resolution or tick rate changes.
+
+    Args:
+        scale (function): scales values from the design grid to screen size
+        fps (int): ticks per second of game time, a divisor of BASE_FPS
+        path (str): move definitions to compile
+
+    Returns:
+        FrameData: compiled moves
+
+    Raises:
+        ValueError: if fps does not divide BASE_FPS, or the file has an
+            unknown or missing move or key
+    """
+
+    if BASE_FPS % fps != 0:
+        raise ValueError(f"fps must divide {BASE_FPS}, got {fps}")
+    base_ticks = BASE_FPS // fps
+    moves = _read_moves(path)
+    body, jump, fall, dash = moves["body"], moves["jump"], moves["fall"], moves["dash"]
+    knockback, sword, downstrike = (
+        moves["knockback"],
+        moves["sword"],
+        moves["downstrike"],
+    )
+    shield, stamina = moves["shield"], moves["stamina"]
+
+    # fall_ticker to the next fall_ticker and the fall speed of one tick
+    initial_fall_speed = scale(fall["acceleration"])
+    max_fall_ticker = fall["max_ticker"]
+    fall_steps = []
+    for ticker in range(max_fall_ticker + 1):
+        speed = 0
+        for _ in range(base_ticks):
+            ticker = min(ticker + 1, max_fall_ticker)
+            speed += initial_fall_speed * ticker
+        fall_steps.append((ticker, speed))
+
+    sword_fps_time = sword["time_seconds"] * fps
+    sword_offsetx, sword_offsety = scale(sword["offset"])
+    downstrike_offsetx, downstrike_offsety = scale(downstrike["offset"])
+    shield_offsetx, shield_offsety = scale(shield["offset"])
+    jump_speed = _curve(resample(scale(jump["velocity"]), base_ticks))
+    dash_speed = _curve(resample(scale(dash["velocity"]), base_ticks))
+
+    return FrameData(
+        base_ticks=base_ticks,
+        speed=scale(body["walk_speed"]) * base_ticks,
+        jump_speed=jump_speed,
+        jump_fps_time=len(jump_speed),
+        initial_fall_speed=initial_fall_speed,
+        fall_steps=tuple(fall_steps),
+        press_fps_time=dash["double_tap_seconds"] * fps,
+        dash_speed=dash_speed,
+        dash_fps_time=len(dash_speed),
+        knockback_fps_time=knockback["time_seconds"] * fps,
+        sword_fps_time=sword_fps_time,
+        sword_come_out_time=sword_fps_time - sword["startup_seconds"] * fps,
+        sword_come_in_time=sword["recovery_seconds"] * fps,
+        sword_offsety=sword_offsety,
+        sword_flip_offset=scale(sword["flip_offset"]),
+        downstrike_offsetx=downstrike_offsetx,
+        downstrike_offsety=downstrike_offsety,
+        land_downstrike_stun_time_long=round(
+            downstrike["landing_stun_ticks"] / base_ticks
+        ),
+        land_downstrike_stun_time_short=round(
+            downstrike["landing_stun_on_top_ticks"] / base_ticks
+        ),
+        shield_offsety=shield_offsety,
+        shield_flip_offset=scale(shield["flip_offset"]),
+        shield_fps_time=shield["time_seconds"] * fps,
+        stamina_reload_fps_time=stamina["reload_seconds"] * fps,
+        i_frames_time=round(body["i_frames_ticks"] / base_ticks),
+        body_size=tuple(scale(body["size"])),
+        sword_size=tuple(scale(sword["size"])),
+        downstrike_size=tuple(scale(downstrike["size"])),
+        shield_size=tuple(scale(shield["size"])),
+        spawn_x=scale(body["spawn_x"]),
+        sword_offsetx=sword_offsetx,
+        shield_offsetx=shield_offsetx,
+        knockback_speed=scale(knockback["speed"]) * base_ticks,
+        max_stamina=stamina["max"],
+        life=body["life"],
+        max_fall_ticker=max_fall_ticker,
+    )
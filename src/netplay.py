@@ -0,0 +1,351 @@
+import heapq
+import random
+import socket
+import struct
+import time
+
+# sender frame, first frame of the inputs, frames received from the peer,
+# number of inputs, frames the sender thinks it is ahead
+PACKET = struct.Struct("<IIIBb")
+MAX_INPUTS = 255
+SYNC_INTERVAL = 20
+
+
+class UdpTransport:
+    """Non-blocking UDP socket that talks to a single peer.
+
+    The host binds a known port and learns the address of its peer from
+    the first packet it receives.
+    """
+
+    def __init__(self, port=0, peer=None, host=""):
+        """Binds the socket.
+
+        Args:
+            port (int): local port, 0 picks a free one
+            peer (tuple): (host, port) of the peer, None to wait for it
+            host (str): local address to bind, all interfaces by default
+        """
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.peer = peer
+
+    @property
+    def address(self):
+        return self.socket.getsockname()
+
+    def send(self, data):
+        if self.peer is None:
+            return
+        try:
+            self.socket.sendto(data, self.peer)
+        except OSError:
+            pass
+
+    def receive(self):
+        """Returns every datagram that arrived since the last call."""
+
+        packets = []
+        while True:
+            try:
+                data, address = self.socket.recvfrom(2048)
+            except BlockingIOError:
+                break
+            except ConnectionResetError:
+                # the peer is not listening yet
+                continue
+            if self.peer is None:
+                self.peer = address
+            packets.append(data)
+        return packets
+
+    def close(self):
+        self.socket.close()
+
+
+class LatencyShim:
+    """Transport wrapper that delays, jitters and drops outgoing packets.
+
+    Packets are held back until their delivery time has passed, so jitter
+    larger than the send interval also reorders them.
+    """
+
+    def __init__(
+        self,
+        transport,
+        latency=0.0,
+        jitter=0.0,
+        loss=0.0,
+        seed=None,
+        clock=time.perf_counter,
+    ):
+        """Wraps transport.
+
+        Args:
+            transport (UdpTransport): transport to send through
+            latency (float): one-way delay in seconds
+            jitter (float): maximum deviation from latency in seconds
+            loss (float): fraction of packets to drop
+            seed (int): seed of the loss and jitter RNG
+            clock (callable): returns the current time in seconds
+        """
+
+        self.transport = transport
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.queue = []
+        self.count = 0
+
+    def send(self, data):
+        if self.random.random() < self.loss:
+            return
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        heapq.heappush(self.queue, (self.clock() + delay, self.count, data))
+        self.count += 1
+        self.flush()
+
+    def flush(self):
+        """Sends the held back packets that are due."""
+
+        now = self.clock()
+        while self.queue and (self.queue[0][0] <= now):
+            self.transport.send(heapq.heappop(self.queue)[2])
+
+    def receive(self):
+        self.flush()
+        return self.transport.receive()
+
+    def close(self):
+        self.transport.close()
+
+
+class RollbackSession:
+    """Rollback netcode for one side of a networked 1v1 fight.
+
+    Local inputs are scheduled delay frames ahead and applied without
+    waiting for the peer. The remote input of a frame that has not arrived
+    yet is predicted to repeat the last one received. When a received input
+    differs from its prediction, the state before that frame is restored
+    and every frame since is simulated again. The session stalls instead of
+    predicting more than window frames ahead of the peer, and skips a frame
+    now and then when it runs ahead of the peer's clock.
+
+    The game is driven through three callbacks, so the same session works
+    for a Game and for a headless Match.
+    """
+
+    def __init__(
+        self,
+        simulate,
+        snapshot,
+        restore,
+        transport,
+        local_player=1,
+        delay=2,
+        window=8,
+    ):
+        """Creates a session at frame 0.
+
+        Args:
+            simulate (callable): simulate(bits1, bits2) advances one frame
+            snapshot (callable): returns the current state
+            restore (callable): restore(state) goes back to a snapshot
+            transport (UdpTransport | LatencyShim): connection to the peer
+            local_player (int): 1 or 2, the player this side controls
+            delay (int): frames between reading a local input and applying it
+            window (int): most frames that may run on predicted input
+        """
+
+        self.simulate = simulate
+        self.snapshot = snapshot
+        self.restore = restore
+        self.transport = transport
+        self.local_player = local_player
+        self.delay = delay
+        self.window = window
+
+        self.frame = 0
+        self.local = dict.fromkeys(range(delay), 0)
+        self.remote = {}
+        self.confirmed = 0
+        self.peer_received = 0
+        self.peer_frame = 0
+        self.peer_advantage = 0
+        self.since_sync = 0
+        self.used = {}
+        self.snapshots = {}
+        self.rollback_from = None
+        self.resimulating = False
+        self._pruned = 0
+        self._pruned_local = 0
+
+        # stats
+        self.stalls = 0
+        self.sync_waits = 0
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.max_rollback = 0
+        self.resim_time = 0.0
+        self.max_resim_time = 0.0
+
+    def advance(self, bits):
+        """Exchanges inputs and simulates the next frame unless stalled.
+
+        Args:
+            bits (int): local input bitmask, applied delay frames from now
+
+        Returns:
+            bool: False if the frame was not simulated and bits was dropped
+        """
+
+        self._receive()
+        self._rollback()
+
+        if self.frame - self.confirmed >= self.window:
+            self.stalls += 1
+            self._send()
+            return False
+
+        self.since_sync += 1
+        if (self.since_sync >= SYNC_INTERVAL) & (
+            self.advantage() - self.peer_advantage >= 3
+        ):
+            self.since_sync = 0
+            self.sync_waits += 1
+            self._send()
+            return False
+
+        self.local[self.frame + self.delay] = bits
+        self._simulate(self.frame)
+        self.frame += 1
+        self._send()
+        self._prune()
+        return True
+
+    def poll(self):
+        """Exchanges inputs and corrects mispredictions without advancing."""
+
+        self._receive()
+        self._rollback()
+        self._send()
+        self._prune()
+
+    def advantage(self):
+        """Returns how many frames this side is ahead of the peer."""
+
+        return self.frame - self.peer_frame
+
+    def _predict(self, frame):
+        bits = self.remote.get(frame)
+        if bits is None:
+            bits = self.remote.get(self.confirmed - 1, 0)
+        return bits
+
+    def _simulate(self, frame):
+        self.snapshots[frame] = self.snapshot()
+        remote = self._predict(frame)
+        self.used[frame] = remote
+        if self.local_player == 1:
+            self.simulate(self.local[frame], remote)
+        else:
+            self.simulate(remote, self.local[frame])
+
+    def _rollback(self):
+        if self.rollback_from is None:
+            return
+
+        start = time.perf_counter()
+        first = self.rollback_from
+        self.rollback_from = None
+        self.restore(self.snapshots[first])
+        self.resimulating = True
+        for frame in range(first, self.frame):
+            self._simulate(frame)
+        self.resimulating = False
+
+        elapsed = time.perf_counter() - start
+        self.rollbacks += 1
+        self.resimulated += self.frame - first
+        self.max_rollback = max(self.max_rollback, self.frame - first)
+        self.resim_time += elapsed
+        self.max_resim_time = max(self.max_resim_time, elapsed)
+
+    def _receive(self):
+        for data in self.transport.receive():
+            if len(data) < PACKET.size:
+                continue
+            frame, first, received, count, advantage = PACKET.unpack_from(data)
+            if frame >= self.peer_frame:
+                self.peer_frame = frame
+                self.peer_advantage = advantage
+            self.peer_received = max(self.peer_received, received)
+
+            inputs = data[PACKET.size : PACKET.size + count]
+            for frame, bits in enumerate(inputs, first):
+                if (frame < self.confirmed) or (frame in self.remote):
+                    continue
+                self.remote[frame] = bits
+                if (frame < self.frame) and (self.used[frame] != bits):
+                    if (self.rollback_from is None) or (frame < self.rollback_from):
+                        self.rollback_from = frame
+
+            while self.confirmed in self.remote:
+                self.confirmed += 1
+
+    def _send(self):
+        first = self.peer_received
+        last = min(self.frame + self.delay, first + MAX_INPUTS)
+        inputs = bytes(self.local[frame] for frame in range(first, last))
+        advantage = max(-128, min(self.advantage(), 127))
+        self.transport.send(
+            PACKET.pack(self.frame, first, self.confirmed, len(inputs), advantage)
+            + inputs
+        )
+
+    def _prune(self):
+        """Forgets frames that can no longer be rolled back or resent."""
+
+        # the last confirmed remote input is kept for predictions, and remote
+        # inputs that arrived ahead of this side until they are simulated
+        while self._pruned < min(self.confirmed - 1, self.frame):
+            self.snapshots.pop(self._pruned, None)
+            self.used.pop(self._pruned, None)
+            self.remote.pop(self._pruned, None)
+            self._pruned += 1
+        # local inputs are kept until the peer has them and they cannot be
+        # resimulated any more
+        while self._pruned_local < min(self.peer_received, self.confirmed, self.frame):
+            self.local.pop(self._pruned_local, None)
+            self._pruned_local += 1
+
+    def stats(self):
+        """Returns rollback counts and resimulation costs."""
+
+        return {
+            "frames": self.frame,
+            "stalls": self.stalls,
+            "sync_waits": self.sync_waits,
+            "rollbacks": self.rollbacks,
+            "rollback_rate": self.rollbacks / max(1, self.frame),
+            "resimulated_frames": self.resimulated,
+            "max_rollback": self.max_rollback,
+            "resim_ms_mean": 1000 * self.resim_time / max(1, self.rollbacks),
+            "resim_ms_max": 1000 * self.max_resim_time,
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (
+            f"{stats['frames']} frames, {stats['stalls']} stalls, "
+            f"{stats['sync_waits']} sync waits, "
+            f"{stats['rollbacks']} rollbacks ({100 * stats['rollback_rate']:.1f}%), "
+            f"{stats['resimulated_frames']} resimulated frames, "
+            f"max depth {stats['max_rollback']}, "
+            f"resim {stats['resim_ms_mean']:.3f} ms mean "
+            f"{stats['resim_ms_max']:.3f} ms max"
+        )
@@ -0,0 +1,121 @@
+import json
+import time
+from array import array
+
+PHASES = (
+    "handle_menu",
+    "handle_input",
+    "ai",
+    "update",
+    "handle_collisions",
+    "movement",
+    "audio",
+    "show",
+    "show_data",
+    "handle_events",
+    "update_display",
+    "idle",
+)
+
+
+class FrameProfiler:
+    """Times each phase of a frame into fixed-size ring buffers.
+
+    Phases are timed with lap(), which charges the time since the previous
+    lap to the given phase, so consecutive phases need a single clock read
+    each. A phase that runs several times in a frame, such as one per
+    simulation tick, is summed. While disabled every call returns at once.
+    enable() starts timing at the next begin_frame(), so no frame is
+    recorded that was only partly timed.
+    """
+
+    def __init__(self, phases=PHASES, size=3600, enabled=False):
+        self.phases = phases
+        self.size = size
+        self.enabled = enabled
+        self.samples = {phase: array("d", bytes(8 * size)) for phase in phases}
+        self.current = dict.fromkeys(phases, 0.0)
+        self.frames = 0
+        self.last = 0.0
+        self.starting = False
+
+    def enable(self):
+        """Starts timing from the next frame."""
+
+        if self.enabled is False:
+            self.starting = True
+
+    def begin_frame(self):
+        if self.starting is True:
+            self.starting = False
+            self.enabled = True
+            self.current = dict.fromkeys(self.phases, 0.0)
+        if self.enabled is False:
+            return
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        """Charges the time since the previous lap to phase."""
+
+        if self.enabled is False:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """Stores the frame's phase times in the ring buffers."""
+
+        if self.enabled is False:
+            return
+        index = self.frames % self.size
+        for phase, seconds in self.current.items():
+            self.samples[phase][index] = seconds
+            self.current[phase] = 0.0
+        self.frames += 1
+
+    def recorded(self, phase):
+        """Returns the buffered times of phase in seconds, oldest first."""
+
+        samples = self.samples[phase]
+        if self.frames <= self.size:
+            return samples[: self.frames].tolist()
+        index = self.frames % self.size
+        return (samples[index:] + samples[:index]).tolist()
+
+    def percentiles(self, percents=(50, 99)):
+        """Returns phase to a tuple of percentiles in milliseconds."""
+
+        stats = {}
+        for phase in self.phases:
+            values = sorted(self.recorded(phase))
+            if not values:
+                stats[phase] = tuple(0.0 for _ in percents)
+                continue
+            stats[phase] = tuple(
+                1000 * values[round(p / 100 * (len(values) - 1))] for p in percents
+            )
+        return stats
+
+    def dump(self, path):
+        """Writes the buffered frames to a .csv or .jsonl file, in milliseconds."""
+
+        first = max(0, self.frames - self.size)
+        columns = [self.recorded(phase) for phase in self.phases]
+        rows = zip(range(first, self.frames), *columns)
+
+        with open(path, "w") as f:
+            if path.endswith(".jsonl"):
+                for frame, *values in rows:
+                    record = {"frame": frame}
+                    record.update(
+                        (phase, 1000 * v) for phase, v in zip(self.phases, values)
+                    )
+                    f.write(json.dumps(record) + "\n")
+            else:
+                f.write(",".join(("frame",) + self.phases) + "\n")
+                for frame, *values in rows:
+                    f.write(
+                        ",".join([str(frame)] + [f"{1000 * v:.4f}" for v in values])
+                        + "\n"
+                    )
@@ -0,0 +1,189 @@
+import math
+
+import pygame
+
+
+class DirtyScreen:
+    """Screen wrapper that only redraws and presents regions that changed.
+
+    Everything drawn during a frame goes through blit(), which records the
+    covered rect. The next frame erases those rects from a cached background
+    instead of clearing the whole screen, and present() passes only the
+    erased and newly drawn rects to pygame.display.update. An optional
+    overlay, such as the HUD, stays on top and is only redrawn where
+    something touched it.
+
+    With a window, screen is an offscreen surface of fixed size that is
+    upscaled into the window, so drawing costs the same at any window
+    size. Only the changed rects are upscaled, widened to tiles that map
+    to whole window pixels, which gives the same pixels as scaling the
+    whole screen.
+    """
+
+    def __init__(self, screen, window=None):
+        """Wraps screen, or renders to screen and presents it in window.
+
+        Args:
+            screen (pygame.Surface): surface everything is drawn on
+            window (pygame.Surface): display surface to upscale screen into
+        """
+
+        self.screen = screen
+        self.window = None
+        self.viewport = None
+        self.tile = (1, 1)
+        self.background = None
+        self.overlay = None
+        self.overlay_rect = None
+        self.drawn = []
+        self.previous = []
+        self.dirty = []
+        self.full_redraw = True
+        if window is not None:
+            self.set_window(window)
+
+    def get_size(self):
+        return self.screen.get_size()
+
+    def get_width(self):
+        return self.screen.get_width()
+
+    def get_height(self):
+        return self.screen.get_height()
+
+    def set_window(self, window):
+        """Switches the window screen is upscaled into, e.g. after VIDEORESIZE.
+
+        screen keeps its aspect ratio and is centered, with black bars
+        filling the rest of the window.
+        """
+
+        width, height = self.screen.get_size()
+        factor = min(window.get_width() / width, window.get_height() / height)
+        size = (max(1, round(width * factor)), max(1, round(height * factor)))
+        self.viewport = pygame.Rect((0, 0), size)
+        self.viewport.center = window.get_rect().center
+        self.tile = (
+            width // math.gcd(width, size[0]),
+            height // math.gcd(height, size[1]),
+        )
+        self.window = window
+        self.window.fill((0, 0, 0))
+        self.full_redraw = True
+
+    def _upscale(self, rect):
+        """Scales rect of screen into the window.
+
+        Returns:
+            pygame.Rect: updated window area
+        """
+
+        width, height = self.screen.get_size()
+        view_width, view_height = self.viewport.size
+        tile_width, tile_height = self.tile
+        left = rect.left // tile_width * tile_width
+        top = rect.top // tile_height * tile_height
+        right = min(width, -(-rect.right // tile_width) * tile_width)
+        bottom = min(height, -(-rect.bottom // tile_height) * tile_height)
+        if (right <= left) | (bottom <= top):
+            return None
+
+        x = left * view_width // width
+        y = top * view_height // height
+        dest = pygame.Rect(
+            self.viewport.x + x,
+            self.viewport.y + y,
+            right * view_width // width - x,
+            bottom * view_height // height - y,
+        )
+        pygame.transform.scale(
+            self.screen.subsurface((left, top, right - left, bottom - top)),
+            dest.size,
+            self.window.subsurface(dest),
+        )
+        return dest
+
+    def set_layers(self, background, overlay=None):
+        """Sets the static background and the overlay drawn on top.
+
+        Args:
+            background (pygame.Surface): screen sized background
+            overlay (pygame.Surface): transparent layer placed at (0, 0)
+        """
+
+        self.background = background
+        self.overlay = overlay
+        self.overlay_rect = None if overlay is None else overlay.get_rect()
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """Erases everything drawn in the previous frame."""
+
+        if self.full_redraw is True:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)
+            self.dirty.extend(self.previous)
+
+    def blit(self, surface, dest, area=None):
+        rect = self.screen.blit(surface, dest, area)
+        if rect.width and rect.height:
+            if isinstance(dest, pygame.Rect):
+                dest = dest.topleft
+            self.drawn.append((surface, dest, area, rect))
+        return rect
+
+    def refresh_overlay(self):
+        """Marks the whole overlay for redrawing after its surface changed."""
+
+        self.dirty.append(self.overlay_rect)
+
+    def _recompose(self, rect):
+        """Redraws rect from the background, this frame's blits and the overlay."""
+
+        self.screen.set_clip(rect)
+        self.screen.blit(self.background, rect, rect)
+        for surface, dest, area, drawn_rect in self.drawn:
+            if drawn_rect.colliderect(rect):
+                self.screen.blit(surface, dest, area)
+        self.screen.blit(self.overlay, (0, 0))
+        self.screen.set_clip(None)
+
+    def present(self):
+        """Puts the overlay back on top and pushes the changed rects."""
+
+        drawn_rects = [rect for _, _, _, rect in self.drawn]
+        dirty = self.dirty + drawn_rects
+
+        if self.overlay is not None:
+            if self.full_redraw is True:
+                touched = [self.overlay_rect]
+            else:
+                touched = [
+                    rect.clip(self.overlay_rect)
+                    for rect in dirty
+                    if rect.colliderect(self.overlay_rect)
+                ]
+            if touched:
+                self._recompose(touched[0].unionall(touched[1:]))
+
+        if self.window is not None:
+            if self.full_redraw is True:
+                self._upscale(self.screen.get_rect())
+                pygame.display.update()
+                self.full_redraw = False
+            else:
+                updated = [
+                    self._upscale(rect.clip(self.screen.get_rect())) for rect in dirty
+                ]
+                pygame.display.update([rect for rect in updated if rect is not None])
+        elif self.full_redraw is True:
+            pygame.display.update()
+            self.full_redraw = False
+        else:
+            pygame.display.update(dirty)
+
+        self.previous = drawn_rects
+        self.drawn = []
+        self.dirty = []
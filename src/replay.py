@@ -0,0 +1,173 @@
+import bisect
+import json
+import struct
+import zlib
+
+import pygame
+
+# magic, version, flags, tick rate, screen width, screen height, AI seed
+HEADER = struct.Struct("<4sBBHHHI")
+MAGIC = b"BXRP"
+VERSION = 3
+FLAG_AI = 1
+
+# magic, number of ticks, size of the compressed keyframes before the footer
+FOOTER = struct.Struct("<4sII")
+KEYFRAME_MAGIC = b"BXKF"
+KEYFRAME_INTERVAL = 600
+
+# bits 0-5 of each byte are the ACTIONS bitmask, player 1's byte also
+# carries the keys that restart or leave a finished fight
+RESTART = 1 << 6
+MENU = 1 << 7
+
+
+def system_bits(keys):
+    """Packs the restart and main menu keys of a key state."""
+
+    bits = 0
+    if keys[pygame.K_SPACE]:
+        bits |= RESTART
+    if keys[pygame.K_BACKSPACE]:
+        bits |= MENU
+    return bits
+
+
+def system_keys(bits):
+    """Returns the key state of the restart and main menu keys in bits."""
+
+    return {
+        pygame.K_SPACE: bits & RESTART,
+        pygame.K_BACKSPACE: bits & MENU,
+    }
+
+
+class InputRecorder:
+    """Writes the input bitmasks of both players to a replay file.
+
+    Each tick costs two bytes, so an hour at 60 ticks per second is about
+    420 KB. Together with the screen size and the AI seed in the header
+    this is enough to replay a session bit-exactly. Full state keyframes,
+    taken every KEYFRAME_INTERVAL ticks, are appended on close so replays
+    can be seeked without simulating from the start.
+    """
+
+    def __init__(self, path, screen_size, tick_rate, ai_seed=None):
+        """Opens path and writes the header.
+
+        Args:
+            path (str): replay file path
+            screen_size (tuple): screen size the simulation is scaled to
+            tick_rate (int): simulation ticks per second
+            ai_seed (int): seed of the AIEnemy playing player 2, None without AI
+        """
+
+        self.file = open(path, "wb")
+        self.ticks = 0
+        self.keyframes = {}
+        flags = 0 if ai_seed is None else FLAG_AI
+        self.file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                flags,
+                tick_rate,
+                *screen_size,
+                0 if ai_seed is None else ai_seed,
+            )
+        )
+
+    def write(self, bits1, bits2):
+        """Appends the input bitmasks of one tick."""
+
+        self.file.write(bytes((bits1, bits2)))
+        self.ticks += 1
+
+    def write_keyframe(self, state):
+        """Stores the game state before the next tick is written.
+
+        Args:
+            state (tuple): Game.snapshot() of plain values
+        """
+
+        self.keyframes[self.ticks] = state
+
+    def close(self):
+        """Appends the keyframes and closes the file."""
+
+        keyframes = zlib.compress(json.dumps(list(self.keyframes.items())).encode())
+        self.file.write(keyframes)
+        self.file.write(FOOTER.pack(KEYFRAME_MAGIC, self.ticks, len(keyframes)))
+        self.file.close()
+
+
+class InputReplay:
+    """Reads a replay file written by InputRecorder, one tick at a time.
+
+    Files that were not closed properly have no keyframes; these are then
+    collected while the replay plays instead.
+    """
+
+    def __init__(self, path):
+        """Loads the replay at path.
+
+        Args:
+            path (str): replay file path
+
+        Raises:
+            ValueError: if the file is not a replay of this version
+        """
+
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is not a replay file")
+
+        magic, version, flags, tick_rate, width, height, ai_seed = HEADER.unpack_from(
+            data
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported replay version {version}")
+
+        self.tick_rate = tick_rate
+        self.screen_size = (width, height)
+        self.ai_seed = ai_seed if flags & FLAG_AI else None
+        self.inputs = data[HEADER.size :]
+        self.tick = 0
+        self.keyframes = {}
+
+        # recordings that were not closed have no keyframe footer
+        if len(data) >= HEADER.size + FOOTER.size:
+            magic, ticks, size = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+            if magic == KEYFRAME_MAGIC:
+                self.inputs = data[HEADER.size : HEADER.size + 2 * ticks]
+                keyframes = data[-FOOTER.size - size : -FOOTER.size]
+                for tick, state in json.loads(zlib.decompress(keyframes)):
+                    self.keyframes[tick] = state
+
+    def __len__(self):
+        return len(self.inputs) // 2
+
+    def keyframe_before(self, tick):
+        """Returns the latest keyframe at or before tick.
+
+        Returns:
+            tuple: (keyframe tick, state), or (None, None) without keyframes
+        """
+
+        ticks = sorted(self.keyframes)
+        index = bisect.bisect_right(ticks, tick) - 1
+        if index < 0:
+            return None, None
+        return ticks[index], self.keyframes[ticks[index]]
+
+    def next_inputs(self):
+        """Returns the input bitmasks of the next tick, None at the end."""
+
+        if self.tick >= len(self):
+            return None
+        index = 2 * self.tick
+        self.tick += 1
+        return self.inputs[index], self.inputs[index + 1]
@@ -0,0 +1,1031 @@
+import functools
+import math
+
+import pygame
+
+from src.moves import BASE_FPS, BASE_TICK_RATE, MOVE_CONSTANTS, compile_moves
+
+
+def scale(val, scale_factor):
+    """Scales values from the 960x540 design grid to screen size.
+
+    Args:
+        val (int | float | list | tuple): value or values to be scaled
+        scale_factor (float): pixels per 1/60th of the 16:9 screen ratio
+
+    Returns:
+        int | list: scaled value or values
+    """
+
+    if isinstance(val, (int, float)):
+        return math.floor((val / 60) * scale_factor)
+    if isinstance(val, (list, tuple)):
+        return [math.floor((i / 60) * scale_factor) for i in val]
+
+
+@functools.lru_cache(maxsize=32)
+def scaler(scale_factor):
+    """Returns a function that scales values by scale_factor.
+
+    Equal factors give the same function, so every Fighter at one
+    resolution shares the frame data compile_moves() caches for it.
+    """
+
+    def scale_val(val):
+        return scale(val, scale_factor)
+
+    return scale_val
+
+
+def screen_scale_factor(screen_size, screen_ratio=(16, 9)):
+    """Returns the scale factor that fits the screen ratio in screen_size."""
+
+    horiz = screen_size[0] / screen_ratio[0]
+    vert = screen_size[1] / screen_ratio[1]
+    return min(horiz, vert)
+
+
+def tick_fps(tick_rate):
+    """Returns the Fighter fps that plays at game speed with tick_rate ticks.
+
+    Args:
+        tick_rate (int): simulation ticks per wall-clock second, a divisor
+            of BASE_TICK_RATE
+
+    Returns:
+        int: ticks per second of game time, BASE_FPS at BASE_TICK_RATE
+
+    Raises:
+        ValueError: if tick_rate does not divide BASE_TICK_RATE
+    """
+
+    if BASE_TICK_RATE % tick_rate != 0:
+        raise ValueError(f"tick rate must divide {BASE_TICK_RATE}, got {tick_rate}")
+    return BASE_FPS // (BASE_TICK_RATE // tick_rate)
+
+
+def sweep_contact(rect_a, motion_a, rect_b, motion_b, fraction=1.0):
+    """Returns when two moving rects first overlap, by a swept AABB test.
+
+    Args:
+        rect_a (pygame.Rect): first rect at the start of the tick
+        motion_a (tuple): (dx, dy) rect_a moves by during the tick
+        rect_b (pygame.Rect): second rect at the start of the tick
+        motion_b (tuple): (dx, dy) rect_b moves by during the tick
+        fraction (float): part of the motion to test, 0 only tests overlap
+
+    Returns:
+        float | None: part of the motion after which they overlap, 0 if
+            they already do, None if they don't within fraction
+    """
+
+    if motion_a == motion_b:
+        return 0 if rect_a.colliderect(rect_b) else None
+
+    # rect_a moves relative to rect_b, overlapping on an axis between t0 and t1
+    axes = (
+        (rect_a.left, rect_a.right, rect_b.left, rect_b.right),
+        (rect_a.top, rect_a.bottom, rect_b.top, rect_b.bottom),
+    )
+    start, end = -math.inf, math.inf
+    for (a0, a1, b0, b1), da, db in zip(axes, motion_a, motion_b):
+        v = da - db
+        if v == 0:
+            if (a1 <= b0) | (b1 <= a0):
+                return None
+        else:
+            t0, t1 = (b0 - a1) / v, (b1 - a0) / v
+            if t0 > t1:
+                t0, t1 = t1, t0
+            start, end = max(start, t0), min(end, t1)
+
+    if (start < end) & (end > 0) & (start < fraction):
+        return max(start, 0)
+    return None
+
+
+# attributes that change during a match, saved by Fighter.snapshot() after
+# the positions of the four hitboxes
+FIGHTER_STATE = (
+    "X_change",
+    "Y_change",
+    "jumping",
+    "jump_counter",
+    "falling",
+    "fall_ticker",
+    "on_top",
+    "most_recent_press",
+    "press_state",
+    "press_timer",
+    "dashing",
+    "dash_mod",
+    "dash_counter",
+    "knockback",
+    "knockback_counter",
+    "knockback_speed",
+    "sword_hurtbox",
+    "striking",
+    "striking_counter",
+    "sword_offsetx",
+    "downstriking",
+    "land_downstrike_stun",
+    "land_downstrike_timer",
+    "shield_offsetx",
+    "shielding",
+    "shield_block",
+    "shield_counter",
+    "max_stamina",
+    "stamina",
+    "stamina_reload_counter",
+    "life",
+    "invinsible",
+    "i_frames",
+    "i_frames_invinsible",
+    "facing_left",
+)
+
+# attributes that are fixed for a match, next to the MOVE_CONSTANTS copied
+# from the compiled frame data
+FIGHTER_CONSTANTS = (
+    "scale",
+    "fps",
+    "frames",
+    "width",
+    "height",
+    "ground",
+    "rect",
+    "sword_rect",
+    "downstrike_rect",
+    "shield_rect",
+    "input_dict",
+) + MOVE_CONSTANTS
+
+
+class Fighter:
+    """Gameplay state and rules of one player, without sprites or sounds.
+
+    Only pygame.Rect and the key constants are used, so a Fighter can be
+    stepped without a display or mixer being initialized. All gameplay
+    state lives in slots, which keeps it compact and lets snapshot() and
+    restore() copy it with a single tuple.
+
+    The frame data has a resolution of BASE_FPS base ticks per second of
+    game time, and the game plays BASE_TICK_RATE of them per wall-clock
+    second. A lower fps that divides BASE_FPS makes every tick a step of
+    several base ticks, for coarser simulation: speeds are multiplied,
+    per-tick tables summed and frame counts divided.
+    """
+
+    __slots__ = FIGHTER_CONSTANTS + FIGHTER_STATE
+
+    def __init__(self, arena_size, scale, fps=BASE_FPS, facing_left=False):
+        self.scale = scale
+        self.fps = fps
+        self.frames = frames = compile_moves(scale, fps)
+        for name in MOVE_CONSTANTS:
+            setattr(self, name, getattr(frames, name))
+        self.width, self.height = arena_size
+        self.ground = round(self.height * 0.78)
+
+        # hitboxes
+        self.rect = pygame.Rect((0, 0), frames.body_size)
+        self.sword_rect = pygame.Rect((0, 0), frames.sword_size)
+        self.downstrike_rect = pygame.Rect((0, 0), frames.downstrike_size)
+        self.shield_rect = pygame.Rect((0, 0), frames.shield_size)
+
+        # positioning
+        self.rect.left = frames.spawn_x
+        self.rect.bottom = self.ground
+        self.X_change = 0
+        self.Y_change = 0
+
+        # jumping
+        self.jumping = False
+        self.jump_counter = self.jump_fps_time
+
+        # falling
+        self.falling = False
+        self.fall_ticker = 0
+        self.on_top = False
+
+        # dashing
+        self.most_recent_press = False
+        self.press_state = 0
+        self.press_timer = 0
+        self.dashing = False
+        self.dash_mod = -1
+        self.dash_counter = self.dash_fps_time
+
+        # knockback
+        self.knockback = False
+        self.knockback_counter = self.knockback_fps_time
+        self.knockback_speed = frames.knockback_speed
+
+        # striking
+        self.sword_hurtbox = False
+        self.striking = False
+        self.striking_counter = 0
+        self.sword_offsetx = frames.sword_offsetx
+        self.sword_rect.x = self.rect.x + self.sword_offsetx
+        self.sword_rect.y = self.rect.y - self.sword_offsety
+
+        # downstrike
+        self.downstriking = False
+        self.downstrike_rect.x = self.rect.x + self.downstrike_offsetx
+        self.downstrike_rect.y = self.rect.y - self.downstrike_offsety
+        self.land_downstrike_stun = False
+        self.land_downstrike_timer = 0
+
+        # shield
+        self.shield_offsetx = frames.shield_offsetx
+        self.shield_rect.x = self.rect.x + self.shield_offsetx
+        self.shield_rect.y = self.rect.y - self.shield_offsety
+        self.shielding = False
+        self.shield_block = False
+        self.shield_counter = 0
+
+        # stamina
+        self.max_stamina = frames.max_stamina
+        self.stamina = frames.max_stamina
+        self.stamina_reload_counter = self.stamina_reload_fps_time
+
+        # other attributes
+        self.life = frames.life
+        self.invinsible = False
+        self.i_frames = self.i_frames_time
+        self.i_frames_invinsible = True
+
+        # input keys
+        self.input_dict = {
+            "jump": pygame.K_w,
+            "left": pygame.K_a,
+            "right": pygame.K_d,
+            "down": pygame.K_s,
+            "sword": pygame.K_f,
+            "shield": pygame.K_g,
+        }
+
+        self.facing_left = facing_left
+        if self.facing_left is True:
+            self.flip_player()
+            self.rect.right = self.width - frames.spawn_x
+            self.input_dict = {
+                "jump": pygame.K_UP,
+                "left": pygame.K_LEFT,
+                "right": pygame.K_RIGHT,
+                "down": pygame.K_DOWN,
+                "sword": pygame.K_k,
+                "shield": pygame.K_l,
+            }
+
+    def play_sound(self, name):
+        """Hook called when a sound should play. Silent when headless."""
+
+    def snapshot(self):
+        """Returns the gameplay state as a flat tuple of plain values.
+
+        Returns:
+            tuple: hitbox positions followed by the FIGHTER_STATE attributes
+        """
+
+        return (
+            self.rect.x,
+            self.rect.y,
+            self.sword_rect.x,
+            self.sword_rect.y,
+            self.downstrike_rect.x,
+            self.downstrike_rect.y,
+            self.shield_rect.x,
+            self.shield_rect.y,
+            self.X_change,
+            self.Y_change,
+            self.jumping,
+            self.jump_counter,
+            self.falling,
+            self.fall_ticker,
+            self.on_top,
+            self.most_recent_press,
+            self.press_state,
+            self.press_timer,
+            self.dashing,
+            self.dash_mod,
+            self.dash_counter,
+            self.knockback,
+            self.knockback_counter,
+            self.knockback_speed,
+            self.sword_hurtbox,
+            self.striking,
+            self.striking_counter,
+            self.sword_offsetx,
+            self.downstriking,
+            self.land_downstrike_stun,
+            self.land_downstrike_timer,
+            self.shield_offsetx,
+            self.shielding,
+            self.shield_block,
+            self.shield_counter,
+            self.max_stamina,
+            self.stamina,
+            self.stamina_reload_counter,
+            self.life,
+            self.invinsible,
+            self.i_frames,
+            self.i_frames_invinsible,
+            self.facing_left,
+        )
+
+    def restore(self, state):
+        """Sets the gameplay state to a snapshot() taken earlier."""
+
+        (
+            self.rect.x,
+            self.rect.y,
+            self.sword_rect.x,
+            self.sword_rect.y,
+            self.downstrike_rect.x,
+            self.downstrike_rect.y,
+            self.shield_rect.x,
+            self.shield_rect.y,
+            self.X_change,
+            self.Y_change,
+            self.jumping,
+            self.jump_counter,
+            self.falling,
+            self.fall_ticker,
+            self.on_top,
+            self.most_recent_press,
+            self.press_state,
+            self.press_timer,
+            self.dashing,
+            self.dash_mod,
+            self.dash_counter,
+            self.knockback,
+            self.knockback_counter,
+            self.knockback_speed,
+            self.sword_hurtbox,
+            self.striking,
+            self.striking_counter,
+            self.sword_offsetx,
+            self.downstriking,
+            self.land_downstrike_stun,
+            self.land_downstrike_timer,
+            self.shield_offsetx,
+            self.shielding,
+            self.shield_block,
+            self.shield_counter,
+            self.max_stamina,
+            self.stamina,
+            self.stamina_reload_counter,
+            self.life,
+            self.invinsible,
+            self.i_frames,
+            self.i_frames_invinsible,
+            self.facing_left,
+        ) = state
+
+    def update(self):
+        """Handle events that must take place every frame."""
+
+        self.continue_knockback()
+        self.continue_dash()
+        self.continue_jump()
+        self.check_fall()
+        self.continue_fall()
+        self.stamina_update()
+        self.continue_strike()
+        self.continue_downstrike()
+        self.continue_land_downstrike()
+        self.continue_shield()
+        self.continue_iframes()
+        self.iterate_dash_timer()
+
+    def movement(self):
+        """Handle sprite movements."""
+
+        self.rect.move_ip(self.X_change, self.Y_change)
+
+        if self.rect.x <= 0:
+            self.rect.x = 0
+        elif self.rect.right >= self.width:
+            self.rect.right = self.width
+
+        if self.rect.bottom > self.ground:
+            self.rect.bottom = self.ground
+
+    def motion(self):
+        """Returns the (dx, dy) movement() will move the body by this tick."""
+
+        x = min(max(self.rect.x + self.X_change, 0), self.width - self.rect.width)
+        bottom = min(self.rect.bottom + self.Y_change, self.ground)
+        return x - self.rect.x, bottom - self.rect.bottom
+
+    def flip_player(self):
+        self.sword_offsetx = (self.sword_offsetx + self.sword_flip_offset) * -1
+        self.shield_offsetx = (self.shield_offsetx - self.shield_flip_offset) * -1
+        self.dash_mod *= -1
+
+    def check_fall(self):
+        if (
+            (self.rect.bottom < self.ground)
+            & (self.jumping is False)
+            & (self.on_top is False)
+        ):
+            self.deploy_fall()
+
+    def deploy_fall(self):
+        if self.falling is False:
+            self.falling = True
+            self.fall_ticker = 1
+
+    def continue_fall(self):
+        if (self.rect.bottom == self.ground) or (self.on_top is True):
+            self.falling = False
+            if self.Y_change >= 0:
+                self.Y_change = 0
+
+        if self.falling is True:
+            self.fall_ticker, self.Y_change = self.fall_steps[self.fall_ticker]
+
+    def deploy_jump(self):
+        if (self.jumping is False) & (self.falling is False):
+            self.jumping = True
+            self.jump_counter = self.jump_fps_time
+            self.play_sound("jump")
+
+    def continue_jump(self):
+        if self.jumping is True:
+            if self.jump_counter <= 0:
+                self.jumping = False
+            else:
+                timer = int(self.jump_fps_time - self.jump_counter)
+                self.Y_change = self.jump_speed[timer]
+                self.jump_counter -= 1
+
+    def deploy_knockback(self):
+        if self.knockback is False:
+            self.knockback = True
+            self.X_change = self.knockback_speed
+            self.knockback_counter = self.knockback_fps_time
+
+    def continue_knockback(self):
+        if self.knockback is True:
+            self.knockback_counter -= 1
+
+            if self.knockback_counter <= 0:
+                self.knockback = False
+                self.X_change = 0
+            else:
+                self.X_change = self.knockback_speed
+
+    def check_dash(self, press=None):
+        # if something is pressed
+        if press is not None:
+            # if ready
+            if self.press_state == 0:
+                # get ready to look for upkey
+                self.press_state += 1
+                # start timer
+                self.press_timer = self.press_fps_time
+                # set press id
+                self.most_recent_press = press
+            # if down up down within timer
+            if self.press_state == 2:
+                # if within timer window
+                if self.press_timer > 0:
+                    # if press equals first press
+                    if self.most_recent_press == press:
+                        self.deploy_dash()
+                # always restart after stage 2
+                self.press_state = 0
+        # if nothing is pressed and press_state is ready for upkey
+        if (press is None) & (self.press_state == 1):
+            self.press_state += 1
+        # if timer is up, return to state 0
+        if self.press_timer == 0:
+            self.press_state = 0
+
+    def iterate_dash_timer(self):
+        if self.press_timer > 0:
+            self.press_timer -= 1
+
+    def deploy_dash(self):
+        if (self.is_acting() is False) & (self.stamina > 0):
+            self.X_change = self.dash_speed[0] * self.dash_mod
+            self.dash_counter = self.dash_fps_time
+            self.dashing = True
+            self.play_sound("dash")
+
+            self.stamina -= 1
+            self.stamina_reload_counter = self.stamina_reload_fps_time
+
+    def continue_dash(self):
+        if self.dashing is True:
+            if self.dash_counter <= 0:
+                self.dashing = False
+                self.X_change = 0
+            else:
+                timer = int(self.dash_fps_time - self.dash_counter)
+                self.X_change = self.dash_speed[timer] * self.dash_mod
+                self.dash_counter -= 1
+
+    def stamina_update(self):
+        if (self.stamina < self.max_stamina) & (self.jumping is False):
+            self.stamina_reload_counter -= 1
+            if self.stamina_reload_counter <= 0:
+                self.stamina += 1
+                self.stamina_reload_counter = self.stamina_reload_fps_time
+
+    def deploy_strike(self):
+        """Deploys sword strike and starts timer."""
+
+        if (self.is_acting() is False) & (self.stamina > 0):
+            self.play_sound("sword_swoosh")
+            self.striking = True
+            self.striking_counter = self.sword_fps_time
+
+            self.stamina -= 1
+            self.stamina_reload_counter = self.stamina_reload_fps_time
+
+    def continue_strike(self):
+        """Handles sword strike including hurtbox, frozen frames, and timer countdown"""
+
+        if self.striking is True:
+            self.striking_counter -= 1
+
+            if (
+                self.sword_come_in_time
+                < self.striking_counter
+                < self.sword_come_out_time
+            ):
+                self.sword_rect.x = self.rect.x + self.sword_offsetx
+                self.sword_rect.y = self.rect.y - self.sword_offsety
+                self.sword_hurtbox = True
+            else:
+                self.sword_hurtbox = False
+
+            if self.striking_counter <= 0:
+                self.striking = False
+
+    def deploy_downstrike(self):
+        if (self.is_acting() is False) & (self.stamina > 0):
+            if (self.jumping) or (self.falling):
+                self.X_change = 0
+                self.jumping = False
+                self.play_sound("sword_swoosh")
+                self.downstriking = True
+
+                self.stamina -= 1
+                self.stamina_reload_counter = self.stamina_reload_fps_time
+
+    def continue_downstrike(self):
+        if self.downstriking is True:
+            if self.falling is True:
+                self.X_change = 0
+                self.downstrike_rect.x = self.rect.x + self.downstrike_offsetx
+                self.downstrike_rect.y = self.rect.y - self.downstrike_offsety
+
+            else:
+                self.downstriking = False
+
+                if self.on_top is True:
+                    self.deploy_land_downstrike(self.land_downstrike_stun_time_short)
+                else:
+                    self.deploy_land_downstrike(self.land_downstrike_stun_time_long)
+
+    def deploy_land_downstrike(self, timer):
+        self.play_sound("sword_hit_ground")
+        self.land_downstrike_stun = True
+        self.land_downstrike_timer = timer
+        self.X_change = 0
+
+    def continue_land_downstrike(self):
+        if self.land_downstrike_stun is True:
+            if self.land_downstrike_timer > 0:
+                self.land_downstrike_timer -= 1
+            else:
+                self.land_downstrike_stun = False
+
+    def deploy_shield(self):
+        if (self.is_acting() is False) & (self.stamina > 0):
+            self.play_sound("shield")
+            self.shielding = True
+            self.shield_counter = self.shield_fps_time
+
+            self.stamina -= 1
+            self.stamina_reload_counter = self.stamina_reload_fps_time
+
+            self.X_change = 0
+
+    def continue_shield(self):
+        if self.shielding is True:
+            self.shield_counter -= 1
+            self.shield_rect.x = self.rect.x + self.shield_offsetx
+            self.shield_rect.y = self.rect.y - self.shield_offsety
+            self.shield_block = True
+
+            if self.shield_counter <= 0:
+                self.shielding = False
+                self.shield_block = False
+
+    def deploy_iframes(self):
+        self.invinsible = True
+        self.i_frames_invinsible = True
+        self.i_frames = self.i_frames_time
+
+    def continue_iframes(self):
+        """Handles counting down invinsibility frames."""
+
+        if self.i_frames_invinsible is True:
+            self.i_frames -= 1
+            if self.i_frames <= 0:
+                self.invinsible = False
+                self.i_frames_invinsible = False
+                self.i_frames = self.i_frames_time
+
+    def take_hit(self, knockback=True):
+        self.life -= 1
+        if knockback is True:
+            self.deploy_knockback()
+        self.deploy_iframes()
+
+    def is_ready(self):
+        """Returns True if player is ready for new inputs."""
+        if (self.knockback is False) & (self.land_downstrike_stun is False):
+            return True
+        return False
+
+    def is_acting(self):
+        if (
+            (self.striking is True)
+            or (self.downstriking is True)
+            or (self.shielding is True)
+            or (self.dashing is True)
+        ):
+            return True
+        return False
+
+
+# bit order of the per-player input bitmasks, the input type shared by
+# keyboard polling, AIs, replays and the network
+ACTIONS = ("jump", "left", "right", "down", "sword", "shield")
+JUMP = 1
+LEFT = 2
+RIGHT = 4
+DOWN = 8
+SWORD = 16
+SHIELD = 32
+
+
+def bits_from_keys(keys, input_dict):
+    """Packs the actions a key state presses into an input bitmask.
+
+    Args:
+        keys (pygame.key.ScancodeWrapper | dict): key code to pressed state
+        input_dict (dict): action to key code mapping of the player
+
+    Returns:
+        int: input bitmask, bit i is ACTIONS[i]
+    """
+
+    bits = 0
+    for i, action in enumerate(ACTIONS):
+        if keys[input_dict[action]]:
+            bits |= 1 << i
+    return bits
+
+
+class Match:
+    """Rules of a 1v1 match: input handling, collisions and game over.
+
+    Steps two Fighters exactly like the pygame frontend does, but never
+    draws or plays anything, so it can run faster than real time. When the
+    fighters step several base ticks at once, hitboxes are swept over the
+    base ticks in between, so fast dashes and falls cannot tunnel.
+    """
+
+    def __init__(self, player1, player2, scale, play_sound=None):
+        self.player1 = player1
+        self.player2 = player2
+        self.scale = scale
+        self.play_sound = play_sound
+        self.edge_margin = scale(30)
+        self.base_ticks = player1.base_ticks
+        self.game_over = False
+        self.frame = 0
+
+    @classmethod
+    def headless(cls, screen_size=(960, 540), fps=BASE_FPS):
+        """Creates a match between two Fighters on a virtual screen.
+
+        Args:
+            screen_size (tuple): virtual screen size in pixels
+            fps (int): ticks per second of game time the fighters' timers
+                are based on, below BASE_FPS for coarser steps
+
+        Returns:
+            Match: new match
+        """
+
+        match_scale = scaler(screen_scale_factor(screen_size))
+        player1 = Fighter(screen_size, match_scale, fps=fps, facing_left=False)
+        player2 = Fighter(screen_size, match_scale, fps=fps, facing_left=True)
+        return cls(player1, player2, match_scale)
+
+    def snapshot(self):
+        """Returns the match state, including both players, as a tuple."""
+
+        return (
+            self.frame,
+            self.game_over,
+            self.player1.snapshot(),
+            self.player2.snapshot(),
+        )
+
+    def restore(self, state):
+        """Sets the match state to a snapshot() taken earlier."""
+
+        self.frame, self.game_over, state1, state2 = state
+        self.player1.restore(state1)
+        self.player2.restore(state2)
+
+    def _play_sound(self, name):
+        if self.play_sound is not None:
+            self.play_sound(name)
+
+    def step(self, bits1=0, bits2=0):
+        """Advances the match by one frame.
+
+        Args:
+            bits1 (int): input bitmask of player 1
+            bits2 (int): input bitmask of player 2
+
+        Returns:
+            int | None: result of check_game_over before the frame
+        """
+
+        result = self.check_game_over()
+        self.tick(bits1, bits2)
+        return result
+
+    def tick(self, bits1=0, bits2=0):
+        """Advances the match by one frame without checking for game over."""
+
+        self.handle_input(bits1, bits2)
+        self.update()
+        self.handle_collisions()
+        self.movement()
+        self.frame += 1
+
+    def check_game_over(self):
+        """Ends the match if a player ran out of lives.
+
+        Returns:
+            int | None: winning player number, 0 for a draw, None if not over
+        """
+
+        if (self.player1.life <= 0) & (self.player2.life >= 1):
+            self.player1.rect.y = -2000
+            self.player1.knockback = True
+            self.game_over = True
+            return 2
+
+        elif (self.player2.life <= 0) & (self.player1.life >= 1):
+            self.player2.rect.y = -2000
+            self.player2.knockback = True
+            self.game_over = True
+            return 1
+
+        elif (self.player2.life <= 0) & (self.player1.life <= 0):
+            self.player1.rect.y, self.player2.rect.y = -2000, -2000
+            self.player1.knockback, self.player2.knockback = True, True
+            self.game_over = True
+            return 0
+
+        return None
+
+    def handle_input(self, bits1=0, bits2=0):
+        self.player_movement(self.player1, bits1)
+        self.player_movement(self.player2, bits2)
+
+    def update(self):
+        self.player1.update()
+        self.player2.update()
+
+    def movement(self):
+        self.player1.movement()
+        self.player2.movement()
+
+    def player_movement(self, player, bits):
+        if player.is_ready():
+            # left movement
+            if bits & LEFT:
+                if player.facing_left is False:
+                    player.facing_left = True
+                    player.flip_player()
+
+                player.X_change = -player.speed
+                player.check_dash("Left")
+
+            # right movement
+            if bits & RIGHT:
+                if player.facing_left is True:
+                    player.facing_left = False
+                    player.flip_player()
+
+                player.X_change = player.speed
+                player.check_dash("Right")
+
+            # jumping
+            if bits & JUMP:
+                player.deploy_jump()
+
+            # downstrike
+            if bits & DOWN:
+                player.deploy_downstrike()
+
+            # sword
+            if bits & SWORD:
+                player.deploy_strike()
+
+            # shield
+            if bits & SHIELD:
+                player.deploy_shield()
+
+            # stopping
+            horizontal = bits & (LEFT | RIGHT)
+            if horizontal == LEFT | RIGHT:
+                player.X_change = 0
+            if horizontal == 0:
+                player.X_change = 0
+                player.check_dash()
+
+    def handle_collisions(self):
+        """Handles collisions from both players and swords."""
+
+        self._handle_sword_collisions()
+        self._handle_player_collisions()
+        self._handle_downstrike_collisions()
+
+    def _contact(self, rect_a, playera, rect_b, playerb):
+        """Returns when two hitboxes first overlap during this tick.
+
+        At the base tick rate this is an overlap test. A coarser tick stands
+        for several base ticks, so the rects are swept over the motion of all
+        but the last of them, the positions those ticks would have tested.
+
+        Returns:
+            float | None: part of the tick's motion before they overlap, 0
+                if they already do, None if they don't
+        """
+
+        if self.base_ticks == 1:
+            return 0 if rect_a.colliderect(rect_b) else None
+        # cheap reject first, the arena edges can only shorten these paths
+        path_a = rect_a.union(rect_a.move(playera.X_change, playera.Y_change))
+        path_b = rect_b.union(rect_b.move(playerb.X_change, playerb.Y_change))
+        if not path_a.colliderect(path_b):
+            return None
+        return sweep_contact(
+            rect_a,
+            playera.motion(),
+            rect_b,
+            playerb.motion(),
+            (self.base_ticks - 1) / self.base_ticks,
+        )
+
+    def _move_to_contact(self, contact, playera, playerb):
+        """Moves both players to the base tick in which they first touch.
+
+        Their hitboxes move along, and the rest of their motion stays in
+        X_change and Y_change, so the player collision rules stop them there
+        and the downstrikes still hit, like at the base tick rate.
+        """
+
+        if contact > 0:
+            fraction = (math.floor(contact * self.base_ticks) + 1) / self.base_ticks
+            for player in (playera, playerb):
+                dx, dy = player.motion()
+                dx, dy = int(dx * fraction), int(dy * fraction)
+                player.rect.move_ip(dx, dy)
+                player.sword_rect.move_ip(dx, dy)
+                player.downstrike_rect.move_ip(dx, dy)
+                player.shield_rect.move_ip(dx, dy)
+                player.X_change -= dx
+                player.Y_change -= dy
+
+    def _handle_player_collisions(self):
+        """Handles player collisions."""
+
+        # check collision between 2 players
+        contact = self._contact(
+            self.player1.rect, self.player1, self.player2.rect, self.player2
+        )
+
+        if contact is not None:
+            self._move_to_contact(contact, self.player1, self.player2)
+            self._calc_player_collision(self.player1, self.player2)
+            self._calc_player_collision(self.player2, self.player1)
+        else:
+            self.player1.on_top = False
+            self.player2.on_top = False
+
+    def _calc_player_collision(self, playera, playerb):
+        playera.on_top = self._edge_detection(playera.rect.bottom, playerb.rect.top)
+
+        if (playera.on_top is False) & (playerb.on_top is False):
+            if playera.rect.x < playerb.rect.x:
+                if playera.X_change > 0:
+                    playera.X_change = 0
+                if playerb.X_change < 0:
+                    playerb.X_change = 0
+
+        # if player a is above player b
+        if playera.rect.y < playerb.rect.y:
+            # player a can't fall, player b can't jump
+            if playera.Y_change > 0:
+                playera.Y_change = 0
+            if playerb.Y_change < 0:
+                playerb.Y_change = 0
+
+        if playera.on_top is True:
+            playera.rect.bottom = playerb.rect.top + 1
+
+    def _edge_detection(self, edgea, edgeb):
+        return abs(edgea - edgeb) < self.edge_margin
+
+    def _handle_sword_collisions(self):
+        self._calc_sword_collisions(self.player1, self.player2)
+        self._calc_sword_collisions(self.player2, self.player1)
+
+    def _calc_sword_collisions(self, playera, playerb):
+        # if sword is deployed
+        if playera.sword_hurtbox is True:
+            # check collisions
+            playerb_collide = (
+                self._contact(playera.sword_rect, playera, playerb.rect, playerb)
+                is not None
+            )
+
+            if playerb.shielding is True:
+                shieldb_collide = (
+                    self._contact(
+                        playera.sword_rect, playera, playerb.shield_rect, playerb
+                    )
+                    is not None
+                )
+            else:
+                shieldb_collide = False
+
+            # calc left/right for knockback
+            if playera.rect.centerx < playerb.rect.centerx:
+                playerb.knockback_speed = abs(playerb.knockback_speed)
+                playera.knockback_speed = -abs(playerb.knockback_speed)
+            else:
+                playerb.knockback_speed = -abs(playerb.knockback_speed)
+                playera.knockback_speed = abs(playerb.knockback_speed)
+
+            # hit shield and not player
+            if shieldb_collide and not playerb_collide:
+                self.do_shield_hit(playera)
+
+            # hit player
+            if playerb_collide:
+                if playera.rect.centerx < playerb.rect.centerx:
+                    if (playerb.facing_left) and (playerb.shield_block):
+                        self.do_shield_hit(playera)
+                    else:
+                        self.do_hit(playerb)
+
+                if playera.rect.centerx > playerb.rect.centerx:
+                    if (not playerb.facing_left) and (playerb.shield_block):
+                        self.do_shield_hit(playera)
+                    else:
+                        self.do_hit(playerb)
+
+    def _handle_downstrike_collisions(self):
+        self._calc_downstrike_collisions(self.player1, self.player2)
+        self._calc_downstrike_collisions(self.player2, self.player1)
+
+    def _calc_downstrike_collisions(self, playera, playerb):
+        # if sword is deployed
+        if playera.downstriking is True:
+            # check collisions
+            playerb_collide = (
+                self._contact(playera.downstrike_rect, playera, playerb.rect, playerb)
+                is not None
+            )
+
+            # hit player
+            if playerb_collide:
+                self.do_hit(playerb, knockback=False)
+
+    def do_hit(self, player, knockback=True):
+        if player.invinsible is False:
+            player.take_hit(knockback)
+            self._play_sound("sword_hit")
+
+    def do_shield_hit(self, player):
+        if player.knockback is False:
+            player.stamina = 0
+            self._play_sound("sword_hit_shield")
+            player.deploy_knockback()
@@ -0,0 +1,187 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.ai_enemy import AI_SCHEMES, HEADLESS_SEARCH_NODES, AIEnemy
+from src.simulation import Match
+
+
+def play_match(scheme1, scheme2, seed, max_frames=36000, screen_size=(960, 540)):
+    """Plays one headless AI vs AI match.
+
+    Args:
+        scheme1 (str): ai_scheme of player 1
+        scheme2 (str): ai_scheme of player 2
+        seed (int): seed for both AIs
+        max_frames (int): frames after which the match is called a draw
+        screen_size (tuple): virtual screen size in pixels
+
+    The search scheme stops after HEADLESS_SEARCH_NODES instead of a time
+    budget, so a seed always plays the same match.
+
+    Returns:
+        tuple: (scheme1, scheme2, winning player number or 0 for a draw, frames)
+    """
+
+    seeds = random.Random(seed)
+    match = Match.headless(screen_size)
+    ai1 = AIEnemy(
+        match.player2,
+        match.player1,
+        ai_scheme=scheme1,
+        seed=seeds.getrandbits(32),
+        budget=None,
+        max_nodes=HEADLESS_SEARCH_NODES,
+    )
+    ai2 = AIEnemy(
+        match.player1,
+        match.player2,
+        ai_scheme=scheme2,
+        seed=seeds.getrandbits(32),
+        budget=None,
+        max_nodes=HEADLESS_SEARCH_NODES,
+    )
+
+    result = None
+    while match.frame < max_frames:
+        result = match.check_game_over()
+        if result is not None:
+            break
+        match.tick(ai1.get_input(), ai2.get_input())
+
+    if result is None:
+        result = 0
+    return scheme1, scheme2, result, match.frame
+
+
+def _play_match(args):
+    return play_match(*args)
+
+
+def schedule(schemes, matches, seed=0):
+    """Returns round-robin match arguments over all ordered scheme pairs.
+
+    Args:
+        schemes (list): ai_schemes taking part
+        matches (int): total number of matches
+        seed (int): base seed, match i uses seed + i
+
+    Returns:
+        list: (scheme1, scheme2, seed) per match
+    """
+
+    pairs = list(itertools.permutations(schemes, 2))
+    return [(*pairs[i % len(pairs)], seed + i) for i in range(matches)]
+
+
+def run_tournament(
+    schemes, matches, workers=None, seed=0, max_frames=36000, screen_size=(960, 540)
+):
+    """Plays a round-robin tournament across a process pool.
+
+    Returns:
+        list: play_match results in schedule order
+    """
+
+    jobs = [
+        (scheme1, scheme2, match_seed, max_frames, screen_size)
+        for scheme1, scheme2, match_seed in schedule(schemes, matches, seed)
+    ]
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(jobs) // (workers * 8))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_play_match, jobs, chunksize=chunksize))
+
+
+def standings(results, k=16, initial_elo=1000):
+    """Aggregates match results per scheme.
+
+    Elo is updated match by match in schedule order, so the ladder is
+    reproducible for a given seed.
+
+    Args:
+        results (list): play_match results
+        k (int): Elo K-factor
+        initial_elo (int): starting Elo of every scheme
+
+    Returns:
+        dict: scheme to wins, draws, losses, frames, matches and elo
+    """
+
+    table = {}
+    for scheme1, scheme2, result, frames in results:
+        for scheme in (scheme1, scheme2):
+            if scheme not in table:
+                table[scheme] = {
+                    "wins": 0,
+                    "draws": 0,
+                    "losses": 0,
+                    "frames": 0,
+                    "matches": 0,
+                    "elo": float(initial_elo),
+                }
+
+        row1, row2 = table[scheme1], table[scheme2]
+        score1 = {1: 1.0, 2: 0.0, 0: 0.5}[result]
+        if result == 0:
+            row1["draws"] += 1
+            row2["draws"] += 1
+        else:
+            winner, loser = (row1, row2) if result == 1 else (row2, row1)
+            winner["wins"] += 1
+            loser["losses"] += 1
+
+        for row in (row1, row2):
+            row["frames"] += frames
+            row["matches"] += 1
+
+        if scheme1 != scheme2:
+            expected1 = 1 / (1 + 10 ** ((row2["elo"] - row1["elo"]) / 400))
+            row1["elo"] += k * (score1 - expected1)
+            row2["elo"] -= k * (score1 - expected1)
+
+    return table
+
+
+def format_standings(table):
+    """Returns the standings as a text table sorted by Elo."""
+
+    lines = [
+        f"{'scheme':<16}{'elo':>8}{'win%':>8}"
+        f"{'W':>8}{'D':>8}{'L':>8}{'avg frames':>12}"
+    ]
+    for scheme, row in sorted(table.items(), key=lambda item: -item[1]["elo"]):
+        win_rate = 100 * row["wins"] / row["matches"]
+        avg_length = row["frames"] / row["matches"]
+        lines.append(
+            f"{scheme:<16}{row['elo']:>8.0f}{win_rate:>7.1f}%"
+            f"{row['wins']:>8}{row['draws']:>8}{row['losses']:>8}{avg_length:>12.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin AI tournament.")
+    parser.add_argument("--schemes", nargs="+", default=list(AI_SCHEMES))
+    parser.add_argument("--matches", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-frames", type=int, default=36000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_tournament(
+        args.schemes, args.matches, args.workers, args.seed, args.max_frames
+    )
+    elapsed = time.perf_counter() - start
+
+    print(format_standings(standings(results)))
+    print(f"\n{len(results)} matches in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
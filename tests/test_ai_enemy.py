@@ -0,0 +1,66 @@
+import pytest
+
+from src.ai_enemy import (
+    CLOSE_DISTANCE,
+    FAR_DISTANCE,
+    HEADLESS_SEARCH_NODES,
+    AIEnemy,
+    AIFeatures,
+)
+from src.simulation import Match
+
+
+@pytest.mark.parametrize("screen_size", ((960, 540), (1920, 1080), (1366, 768)))
+def test_feature_thresholds_scale_with_the_screen(screen_size):
+    match = Match.headless(screen_size)
+    fighter, opponent = match.player2, match.player1
+    features = AIFeatures(match.scale)
+    bands = (
+        (match.scale(CLOSE_DISTANCE) - 1, "close"),
+        ((match.scale(CLOSE_DISTANCE) + match.scale(FAR_DISTANCE)) // 2, "medium"),
+        (match.scale(FAR_DISTANCE) + 1, "far"),
+    )
+    for distance, band in bands:
+        for side in (-1, 1):
+            opponent.rect.centerx = fighter.rect.centerx + side * distance
+            features.observe(opponent, fighter)
+            assert features.distance == distance
+            assert (features.left, features.right) == (side < 0, side > 0)
+            assert (features.close, features.medium, features.far) == (
+                band == "close",
+                band == "medium",
+                band == "far",
+            )
+
+
+def search_inputs(seed, frames=300):
+    """Plays a node-capped search AI against a heuristic one.
+
+    Returns:
+        tuple: input bitmasks of the search AI and its stats()
+    """
+
+    match = Match.headless()
+    search = AIEnemy(
+        match.player1,
+        match.player2,
+        "search",
+        seed=seed,
+        budget=None,
+        max_nodes=HEADLESS_SEARCH_NODES,
+    )
+    heuristic = AIEnemy(match.player2, match.player1, seed=seed + 1)
+    inputs = []
+    for _ in range(frames):
+        bits1, bits2 = heuristic.get_input(), search.get_input()
+        inputs.append(bits2)
+        match.step(bits1, bits2)
+    return inputs, search.stats()
+
+
+def test_node_capped_search_is_deterministic():
+    inputs, stats = search_inputs(3)
+    assert stats["searches"] > 0
+    assert stats["nodes"] >= stats["searches"] * HEADLESS_SEARCH_NODES
+    assert len(set(inputs)) > 1
+    assert search_inputs(3)[0] == inputs
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pygame
+import pytest
+
+from src.asset_pack import (
+    INDEX_FILE,
+    VERSION,
+    build_sprite_pack,
+    load_sprite_pack,
+    read_index,
+    size_name,
+    sprite_keys,
+)
+from src.assets import AssetRegistry
+
+SCREEN_SIZE = (960, 540)
+
+
+@pytest.fixture(scope="module")
+def display():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    yield
+    pygame.display.quit()
+
+
+@pytest.fixture
+def pack_dir(display, tmp_path):
+    """Builds the sprite pack of SCREEN_SIZE into tmp_path."""
+
+    index = {
+        "version": VERSION,
+        "sprites": {size_name(SCREEN_SIZE): build_sprite_pack(SCREEN_SIZE, tmp_path)},
+    }
+    (tmp_path / INDEX_FILE).write_text(json.dumps(index))
+    return tmp_path
+
+
+def test_pack_has_every_sprite_the_game_requests(pack_dir):
+    registry = AssetRegistry()
+    assert load_sprite_pack(SCREEN_SIZE, registry, pack_dir) is True
+    assert set(registry.surfaces) == set(sprite_keys(SCREEN_SIZE))
+    for (_, size, _, rotation), surface in registry.surfaces.items():
+        if rotation == 0:
+            assert surface.get_size() == size
+
+
+def test_pack_with_other_move_sizes_is_not_used(pack_dir):
+    index = read_index(pack_dir)
+    entries = index["sprites"][size_name(SCREEN_SIZE)]["entries"]
+    for entry in entries:
+        if entry[0] == "sprites/sword.png":
+            entry[1] = [size + 10 for size in entry[1]]
+    registry = AssetRegistry()
+    with pytest.warns(UserWarning, match="moves.json"):
+        assert load_sprite_pack(SCREEN_SIZE, registry, pack_dir, index) is False
+    assert registry.surfaces == {}
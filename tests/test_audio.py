@@ -0,0 +1,53 @@
+from src.audio import MAX_VOICES, AudioQueue
+
+
+class FakeSound:
+    """Sound that stays on a channel for a fixed number of frames."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.channels = []
+
+    def get_num_channels(self):
+        return len(self.channels)
+
+    def play(self):
+        self.channels.append(self.frames)
+
+    def advance(self):
+        self.channels = [left - 1 for left in self.channels if left > 1]
+
+
+class FakeBank:
+    def __init__(self, names, frames=10):
+        self.sounds = {name: FakeSound(frames) for name in names}
+
+    def sound(self, name):
+        return self.sounds[name]
+
+
+def test_a_sound_never_plays_on_more_than_max_voices():
+    bank = FakeBank(("sword_hit", "jump"))
+    queue = AudioQueue(bank)
+    most = 0
+    for _ in range(60):
+        for _ in range(5):
+            queue.emit("sword_hit")
+        queue.emit("jump")
+        queue.drain()
+        for sound in bank.sounds.values():
+            most = max(most, sound.get_num_channels())
+            sound.advance()
+    assert most == MAX_VOICES
+    assert queue.capped > 0
+    assert queue.merged == 60 * 4
+
+
+def test_muted_queue_plays_nothing():
+    bank = FakeBank(("jump",))
+    queue = AudioQueue(bank)
+    queue.muted = True
+    queue.emit("jump")
+    queue.drain()
+    assert queue.played == 0
+    assert bank.sounds["jump"].get_num_channels() == 0
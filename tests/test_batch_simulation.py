@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.batch_simulation import BatchMatch, random_inputs  # noqa: E402
+from src.simulation import Match  # noqa: E402
+
+
+def test_batch_matches_scalar():
+    """Steps a BatchMatch and n scalar Matches with the same inputs."""
+
+    n, frames, screen_size = 64, 3000, (960, 540)
+    batch = BatchMatch(n, screen_size)
+    matches = [Match.headless(screen_size) for _ in range(n)]
+    inputs = random_inputs(np.random.default_rng(0), n)
+
+    for frame in range(frames):
+        bits = next(inputs)
+        result = batch.step(bits)
+        for i, match in enumerate(matches):
+            p1, p2 = match.player1, match.player2
+            scalar_result = match.step(int(bits[0, i]), int(bits[1, i]))
+            expected = -1 if scalar_result is None else scalar_result
+            assert result[i] == expected, (frame, i, "result")
+
+            for p, player in enumerate((p1, p2)):
+                state = {
+                    "x": player.rect.x,
+                    "y": player.rect.y,
+                    "X_change": player.X_change,
+                    "Y_change": player.Y_change,
+                    "stamina": player.stamina,
+                    "life": player.life,
+                    "facing_left": player.facing_left,
+                    "knockback": player.knockback,
+                    "on_top": player.on_top,
+                    "sword_hurtbox": player.sword_hurtbox,
+                    "shielding": player.shielding,
+                    "downstriking": player.downstriking,
+                    "i_frames": player.i_frames,
+                    "press_state": player.press_state,
+                }
+                if player.sword_hurtbox is True:
+                    state["sword_x"] = player.sword_rect.x
+                    state["sword_y"] = player.sword_rect.y
+                if player.downstriking is True:
+                    state["ds_x"] = player.downstrike_rect.x
+                    state["ds_y"] = player.downstrike_rect.y
+                if player.shielding is True:
+                    state["shield_x"] = player.shield_rect.x
+                    state["shield_y"] = player.shield_rect.y
+                for attr, value in state.items():
+                    batch_value = getattr(batch, attr)[p, i]
+                    assert batch_value == value, (frame, i, p, attr, batch_value, value)
+
+
+def test_coarse_steps_are_rejected():
+    """Collisions are not swept, so only BASE_FPS steps are supported."""
+
+    with pytest.raises(ValueError):
+        BatchMatch(4, fps=30)
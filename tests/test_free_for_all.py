@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from src.free_for_all import FreeForAll, nearest_opponents
+from src.simulation import BASE_FPS, FIGHTER_STATE, Match
+
+TICK_RATES = (BASE_FPS, BASE_FPS // 4)
+
+
+def _duel_state(fighter):
+    """Returns the snapshot of fighter without an unused knockback_speed.
+
+    Match sets knockback_speed whenever a sword is out, even out of reach,
+    and FreeForAll skips that pair. Outside a knockback the value is never
+    read before the next hit sets it again, so it is left out.
+    """
+
+    state = list(fighter.snapshot())
+    if fighter.knockback is False:
+        state[8 + FIGHTER_STATE.index("knockback_speed")] = None
+    return state
+
+
+@pytest.mark.parametrize("fps", TICK_RATES)
+def test_sweep_and_prune_matches_all_pairs(fps):
+    """Both broadphases report the same pairs and end in the same state."""
+
+    n = 32
+    rng = random.Random(0)
+    pruned = FreeForAll.headless(n, fps=fps)
+    brute = FreeForAll.headless(n, fps=fps, broadphase=False)
+    for frame in range(3000):
+        inputs = [rng.getrandbits(6) for _ in range(n)]
+        pruned.check_game_over()
+        brute.check_game_over()
+        pruned.handle_input(inputs)
+        brute.handle_input(inputs)
+        pruned.update()
+        brute.update()
+        assert pruned.candidate_pairs() == brute.candidate_pairs(), frame
+        pruned.handle_collisions()
+        brute.handle_collisions()
+        pruned.movement()
+        brute.movement()
+        assert pruned.snapshot()[2:] == brute.snapshot()[2:], frame
+
+
+@pytest.mark.parametrize("fps", TICK_RATES)
+def test_duel_plays_like_match(fps):
+    """Two fighters play like Match, a new duel starts whenever one ends."""
+
+    rng = random.Random(0)
+    duel = match = None
+    for frame in range(3000):
+        if (duel is None) or (match.game_over is True):
+            match = Match.headless(fps=fps)
+            players = Match.headless(fps=fps)
+            duel = FreeForAll([players.player1, players.player2], players.scale)
+        bits1, bits2 = rng.getrandbits(6), rng.getrandbits(6)
+        result = duel.step([bits1, bits2])
+        assert result == match.step(bits1, bits2), frame
+        if result is None:
+            for fighter, reference in zip(
+                duel.fighters, (match.player1, match.player2)
+            ):
+                assert _duel_state(fighter) == _duel_state(reference), frame
+
+
+@pytest.mark.parametrize("broadphase", (True, False))
+@pytest.mark.parametrize("fps", TICK_RATES)
+def test_snap_collides_with_new_pair(fps, broadphase):
+    """a lands on b and is snapped up into c, which only then lands on a."""
+
+    match = FreeForAll.headless(3, fps=fps, broadphase=broadphase)
+    a, b, c = match.fighters
+    b.rect.bottomleft = (match.scale(200), b.ground)
+    a.rect.bottomleft = (b.rect.x + match.scale(10), b.rect.top + match.scale(20))
+    c.rect.bottomleft = (a.rect.x + match.scale(10), a.rect.top - match.scale(5))
+    assert match.candidate_pairs() == [(0, 1)]
+    match.handle_collisions()
+    assert a.on_top is True
+    assert c.on_top is True
+    assert c.rect.bottom == a.rect.top + 1
+
+
+def test_nearest_opponents():
+    match = FreeForAll.headless(4)
+    assert nearest_opponents(match) == {0: 1, 1: 0, 2: 1, 3: 2}
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from src.moves import BASE_FPS, compile_moves, load_moves
+from src.simulation import scaler
+
+# tick counts of the moves before they were read from moves.json, as the
+# Player of the original game computed them at a given fps
+BASELINE_TIMES = {
+    "press_fps_time": 0.1,
+    "knockback_fps_time": 0.125,
+    "sword_fps_time": 0.2,
+    "sword_come_in_time": 0.08,
+    "shield_fps_time": 0.24,
+    "stamina_reload_fps_time": 0.4,
+}
+
+# counts the original game kept in ticks at BASE_FPS
+BASELINE_TICKS = {
+    "land_downstrike_stun_time_long": 30,
+    "land_downstrike_stun_time_short": 5,
+    "i_frames_time": 60,
+}
+
+
+def write_moves(tmp_path, change):
+    """Writes a copy of moves.json changed by change(moves) to tmp_path."""
+
+    moves = load_moves()
+    change(moves)
+    path = tmp_path / "moves.json"
+    path.write_text(json.dumps(moves))
+    return str(path)
+
+
+@pytest.mark.parametrize("fps", (BASE_FPS, BASE_FPS // 2))
+def test_compiled_times_match_baseline(fps):
+    frames = compile_moves(scaler(60), fps)
+    for name, seconds in BASELINE_TIMES.items():
+        assert getattr(frames, name) == seconds * fps, name
+    assert frames.sword_come_out_time == 0.2 * fps - 0.02 * fps
+    # tick counts keep their length in game time at coarser steps
+    for name, ticks in BASELINE_TICKS.items():
+        assert getattr(frames, name) == round(ticks * fps / BASE_FPS), name
+
+
+def test_compiled_curves_match_baseline():
+    frames = compile_moves(scaler(60))
+    assert list(frames.jump_speed) == [
+        0, 0, -20, -50, -50, -30, -15, -5, -5, -2, -2, 0, 0, 0, 0
+    ]  # fmt: skip
+    assert list(frames.dash_speed) == [0, -30, -30, -30, -30, -30, -30]
+    assert frames.jump_fps_time == 15
+    assert frames.dash_fps_time == 7
+    assert frames.body_size == (50, 50)
+    assert frames.sword_size == (75, 30)
+    assert frames.shield_size == (5, 50)
+
+
+@pytest.mark.parametrize(
+    "change",
+    (
+        lambda moves: moves["body"].update(reach=10),
+        lambda moves: moves.update(taunt={}),
+        lambda moves: moves["body"].pop("life"),
+        lambda moves: moves.pop("stamina"),
+    ),
+    ids=("unknown key", "unknown move", "missing key", "missing move"),
+)
+def test_unknown_and_missing_keys_are_rejected(tmp_path, change):
+    with pytest.raises(ValueError):
+        load_moves(write_moves(tmp_path, change))
+
+
+@pytest.mark.parametrize(
+    "move, key, misspelled",
+    (
+        ("body", "i_frames_ticks", "i_frames_ms"),
+        ("downstrike", "landing_stun_ticks", "landing_stun_tick"),
+        ("sword", "time_seconds", "time_ms"),
+        ("shield", "time_seconds", "time"),
+    ),
+)
+def test_misspelled_units_are_rejected(tmp_path, move, key, misspelled):
+    def rename(moves):
+        moves[move][misspelled] = moves[move].pop(key)
+
+    path = write_moves(tmp_path, rename)
+    with pytest.raises(ValueError, match=misspelled):
+        compile_moves(scaler(60), BASE_FPS, path)
+
+
+def test_load_moves_returns_a_copy():
+    moves = load_moves()
+    moves["body"]["life"] = 1
+    moves["jump"]["velocity"].clear()
+    assert load_moves()["body"]["life"] == 5
+    assert load_moves()["jump"]["velocity"]
+    assert compile_moves(scaler(60)).life == 5
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from src.netplay import LatencyShim, RollbackSession, UdpTransport
+from src.simulation import Match
+
+
+def held_inputs(rng, hold=8):
+    """Yields random input bitmasks that are held for random durations."""
+
+    bits = 0
+    while True:
+        if rng.randrange(hold) == 0:
+            bits = rng.choice((0, 1, 2, 4, 8, 16, 32, 6, 5, 18))
+        yield bits
+
+
+def play_loopback(frames, delay, window, latency, jitter, loss, seed=0):
+    """Plays two headless sessions against each other over loopback UDP.
+
+    Time is simulated, so this runs as fast as the simulation allows.
+
+    Returns:
+        tuple: stats of the player 1 and player 2 sessions
+
+    Raises:
+        AssertionError: if either side ends up in a different state than a
+            match that received every input on time
+    """
+
+    now = [0.0]
+
+    def clock():
+        return now[0]
+
+    transport1 = UdpTransport(host="127.0.0.1")
+    transport2 = UdpTransport(peer=transport1.address, host="127.0.0.1")
+    sessions = []
+    for player, transport in ((1, transport1), (2, transport2)):
+        match = Match.headless()
+        shim = LatencyShim(transport, latency, jitter, loss, seed + player, clock)
+        session = RollbackSession(
+            match.step, match.snapshot, match.restore, shim, player, delay, window
+        )
+        sessions.append((session, match, held_inputs(random.Random(seed - player))))
+
+    applied = ([0] * delay, [0] * delay)
+    pending = [None, None]
+    while min(session.frame for session, _, _ in sessions) < frames:
+        now[0] += 1 / 60
+        for i, (session, _, inputs) in enumerate(sessions):
+            if session.frame == frames:
+                session.poll()
+                continue
+            if pending[i] is None:
+                pending[i] = next(inputs)
+            if session.advance(pending[i]) is True:
+                applied[i].append(pending[i])
+                pending[i] = None
+
+    while min(session.confirmed for session, _, _ in sessions) < frames:
+        now[0] += 1 / 60
+        for session, _, _ in sessions:
+            session.poll()
+
+    reference = Match.headless()
+    for bits1, bits2 in zip(applied[0][:frames], applied[1][:frames]):
+        reference.step(bits1, bits2)
+    for session, match, _ in sessions:
+        assert match.snapshot() == reference.snapshot(), session.local_player
+        session.transport.close()
+
+    return tuple(session.stats() for session, _, _ in sessions)
+
+
+@pytest.mark.parametrize(
+    "latency, jitter, loss", [(0, 0, 0), (0.05, 0.02, 0.05), (0.1, 0.05, 0.2)]
+)
+def test_loopback_matches_reference(latency, jitter, loss):
+    """Both sides end like a match that got every input on time."""
+
+    stats = play_loopback(3600, 2, 8, latency, jitter, loss)
+    for player_stats in stats:
+        assert player_stats["frames"] == 3600
+        assert player_stats["max_rollback"] <= 8
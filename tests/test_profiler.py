@@ -0,0 +1,37 @@
+from src.profiler import FrameProfiler
+
+
+def play_frame(profiler):
+    """Times one frame through every phase, like the game loop."""
+
+    profiler.begin_frame()
+    for phase in profiler.phases:
+        profiler.lap(phase)
+    profiler.end_frame()
+
+
+def test_enable_mid_frame_records_nothing_until_next_frame():
+    """Enabling between laps, as F3 does, books no time from before it."""
+
+    profiler = FrameProfiler()
+    profiler.begin_frame()
+    profiler.lap("handle_input")
+    profiler.enable()
+    profiler.lap("handle_events")
+    profiler.lap("update_display")
+    profiler.end_frame()
+    assert profiler.frames == 0
+
+    for _ in range(3):
+        play_frame(profiler)
+    assert profiler.frames == 3
+    for phase in profiler.phases:
+        assert all(0.0 <= seconds < 1.0 for seconds in profiler.recorded(phase))
+
+
+def test_enable_while_enabled_keeps_timing():
+    profiler = FrameProfiler(enabled=True)
+    play_frame(profiler)
+    profiler.enable()
+    play_frame(profiler)
+    assert profiler.frames == 2
@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from src.ai_enemy import AIEnemy
+from src.replay import (
+    HEADER,
+    KEYFRAME_INTERVAL,
+    MAGIC,
+    VERSION,
+    InputRecorder,
+    InputReplay,
+)
+from src.simulation import BASE_TICK_RATE, Match
+
+SCREEN_SIZE = (960, 540)
+TICKS = 2000
+
+
+def plain(state):
+    """Returns state with tuples turned into lists, as keyframes store it."""
+
+    return json.loads(json.dumps(state))
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    """Records a fight between two seeded AIs like Game does.
+
+    The random_sequence schemes trade a few hits without ending the fight,
+    so every keyframe interval has something to replay.
+
+    Returns:
+        tuple: replay path and the match snapshot after every tick
+    """
+
+    path = str(tmp_path_factory.mktemp("replay") / "fight.bxr")
+    match = Match.headless(SCREEN_SIZE)
+    ai1 = AIEnemy(match.player2, match.player1, "random_sequence", seed=1)
+    ai2 = AIEnemy(match.player1, match.player2, "random_sequence", seed=11)
+    recorder = InputRecorder(path, SCREEN_SIZE, BASE_TICK_RATE)
+    game_over, winner = False, None
+    states = [match.snapshot()]
+    for _ in range(TICKS):
+        if recorder.ticks % KEYFRAME_INTERVAL == 0:
+            recorder.write_keyframe((game_over, winner, match.snapshot()))
+        bits1, bits2 = ai1.get_input(), ai2.get_input()
+        recorder.write(bits1, bits2)
+        result = match.step(bits1, bits2)
+        if result is not None:
+            game_over, winner = True, result
+        states.append(match.snapshot())
+    recorder.close()
+    return path, states
+
+
+@pytest.fixture(scope="module")
+def game(recording):
+    """Game playing back the recording on SDL's dummy drivers."""
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from main import Game
+
+    return Game(replay_path=recording[0])
+
+
+def test_replay_reads_the_header_and_footer(recording):
+    replay = InputReplay(recording[0])
+    assert replay.screen_size == SCREEN_SIZE
+    assert replay.tick_rate == BASE_TICK_RATE
+    assert replay.ai_seed is None
+    assert len(replay) == TICKS
+    assert sorted(replay.keyframes) == list(range(0, TICKS, KEYFRAME_INTERVAL))
+
+
+def test_replay_plays_back_every_tick(recording, game):
+    _, states = recording
+    game.seek(0)
+    assert plain(game.match.snapshot()) == plain(states[0])
+    for tick in range(1, TICKS + 1):
+        game.tick()
+        assert plain(game.match.snapshot()) == plain(states[tick]), tick
+
+
+@pytest.mark.parametrize(
+    "tick",
+    (
+        KEYFRAME_INTERVAL - 1,
+        KEYFRAME_INTERVAL,
+        KEYFRAME_INTERVAL + 1,
+        3 * KEYFRAME_INTERVAL + 150,
+        2 * KEYFRAME_INTERVAL,
+        1,
+        TICKS,
+    ),
+)
+def test_seek_matches_replaying_from_the_start(recording, game, tick):
+    _, states = recording
+    game.seek(tick)
+    assert game.replay.tick == tick
+    assert plain(game.match.snapshot()) == plain(states[tick])
+
+
+@pytest.mark.parametrize(
+    "offset, value",
+    ((0, b"BXRX"), (len(MAGIC), bytes((VERSION - 1,)))),
+    ids=("magic", "version"),
+)
+def test_bad_header_is_rejected(recording, tmp_path, offset, value):
+    with open(recording[0], "rb") as f:
+        data = bytearray(f.read())
+    data[offset : offset + len(value)] = value
+    path = tmp_path / "bad.bxr"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        InputReplay(str(path))
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / "short.bxr"
+    path.write_bytes(MAGIC + bytes(HEADER.size - len(MAGIC) - 1))
+    with pytest.raises(ValueError):
+        InputReplay(str(path))